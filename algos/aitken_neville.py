@@ -1,6 +1,5 @@
-
-
 import copy
+import numpy as np
 
 """
 Implémente l'algorithme d'Aitken-Neville
@@ -25,4 +24,26 @@ def aitken_neville(pts, tps, t):
             p1 = triangle[i]*(tps[i+k+1] - t)/(tps[i+k+1] - tps[i])
             p2 = triangle[i+1]*((t - tps[i])/(tps[i+k+1] - tps[i]))
             triangle[i] = p1 + p2
-    return triangle[0]
\ No newline at end of file
+    return triangle[0]
+
+
+def aitken_neville_vect(pts, tps, ts):
+    """
+    évalue le polynome d'interpolation en tous les instants de :param ts: à la fois
+    :param pts: les points d'interpolation (tableau numpy de dimension (2, n))
+    :param tps: les paramètres associés (n valeurs)
+    :param ts:  les instants où l'on évalue (tableau numpy de dimension (res,))
+    :return:    les points évalués, tableau numpy de dimension (2, res)
+    """
+    tps = np.asarray(tps, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    n = pts.shape[1]
+    # triangle[:, i, k] = élément i du triangle évalué en ts[k]
+    triangle = np.repeat(pts[:, :, np.newaxis], ts.shape[0], axis=2).astype(float)
+    # écarts[i, k] = ts[k] - tps[i]
+    ecarts = ts[np.newaxis, :] - tps[:, np.newaxis]
+    for k in range(1, n):
+        # une ligne complète du triangle est calculée d'un coup
+        denom = (tps[k:] - tps[:n - k])[:, np.newaxis]
+        triangle = (triangle[:, :n - k] * -ecarts[k:] + triangle[:, 1:n - k + 1] * ecarts[:n - k]) / denom
+    return triangle[:, 0]
@@ -0,0 +1,51 @@
+"""
+Implémente l'évaluation barycentrique (seconde forme) du polynôme
+d'interpolation de Lagrange.
+"""
+
+import numpy as np
+
+
+def poids_barycentriques(tps):
+    """
+    Calcule les poids barycentriques associés aux paramètres d'interpolation.
+    Ils ne dépendent que des paramètres, et pas des points interpolés.
+    :param tps: les paramètres d'interpolation (n valeurs distinctes)
+    :return:    un tableau numpy W de dimension (n,) où W[j] = 1 / prod_{k != j} (tps[j] - tps[k])
+    """
+    tps = np.asarray(tps, dtype=float)
+    ecarts = tps[:, np.newaxis] - tps[np.newaxis, :]
+    np.fill_diagonal(ecarts, 1)
+    # Le produit des écarts dépasse la capacité des flottants lorsque n est grand: il est
+    # calculé sous la forme de la somme de leurs logarithmes, et de son signe. Les poids ne
+    # sont définis qu'à une constante multiplicative près, on les normalise par le plus grand.
+    log_poids = -np.log(np.abs(ecarts)).sum(axis=1)
+    signes = np.where(np.count_nonzero(ecarts < 0, axis=1) % 2, -1.0, 1.0)
+    return signes * np.exp(log_poids - log_poids.max())
+
+
+def barycentrique(pts, tps, poids, ts):
+    """
+    évalue le polynome d'interpolation en tous les instants de :param ts:
+    à l'aide de la formule barycentrique.
+    :param pts:   les points d'interpolation (tableau numpy de dimension (2, n))
+    :param tps:   les paramètres associés (n valeurs)
+    :param poids: les poids barycentriques (voir poids_barycentriques)
+    :param ts:    les instants où l'on évalue (tableau numpy de dimension (res,))
+    :return:      les points évalués, tableau numpy de dimension (2, res)
+    """
+    tps = np.asarray(tps, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    ecarts = ts[np.newaxis, :] - tps[:, np.newaxis]
+
+    # Les instants qui coïncident avec un paramètre d'interpolation sont
+    # traités à part (la formule y présente une division par zéro)
+    exacts = ecarts == 0
+    ecarts[exacts] = 1
+
+    quotients = poids[:, np.newaxis] / ecarts
+    valeurs = (pts @ quotients) / quotients.sum(axis=0)
+
+    i_exacts, k_exacts = np.nonzero(exacts)
+    valeurs[:, k_exacts] = pts[:, i_exacts]
+    return valeurs
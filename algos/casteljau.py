@@ -2,6 +2,8 @@
 Defines the Casteljau algorithm.
 """
 
+import numpy as np
+
 
 def casteljau(points, t):
     """
@@ -17,4 +19,139 @@ def casteljau(points, t):
         return points[:, 0]
     else:
         new_points = (1 - t) * points[:, :n-1] + t * points[:, 1:]
-        return casteljau(new_points, t)
\ No newline at end of file
+        return casteljau(new_points, t)
+
+
+"""
+Matrice de passage des points de contrôle d'une courbe de Bézier cubique aux
+coefficients de son polynôme dans la base canonique (1, t, t^2, t^3).
+"""
+BEZIER_VERS_CANONIQUE = np.array([[1, -3, 3, -1],
+                                  [0, 3, -6, 3],
+                                  [0, 0, 3, -3],
+                                  [0, 0, 0, 1]], dtype=float)
+
+"""
+Paramètres d'échantillonnage utilisés pour l'estimation initiale de projection_bezier,
+et leurs puissances successives (1, t, t^2, t^3).
+"""
+ECHANTILLONS = np.linspace(0, 1, 17)
+ECHANTILLONS_PUISSANCES = ECHANTILLONS[np.newaxis, :] ** np.arange(4)[:, np.newaxis]
+
+
+def bernstein_cubique(ts):
+    """
+    Calcule la matrice des polynômes de Bernstein de degré 3 évalués en :param ts:.
+    :param ts:  Tableau numpy de dimension (res,) des valeurs du paramètre (entre 0 et 1).
+    :return     Un tableau numpy B de dimension (res, 4) tel que B[k, i] = B_i^3(ts[k]).
+                Les points d'une courbe de Bézier cubique de points de contrôle P (2, 4)
+                s'obtiennent alors par P @ B.T
+    """
+    ts = np.asarray(ts, dtype=float)
+    us = 1 - ts
+    return np.stack((us ** 3, 3 * ts * us ** 2, 3 * ts ** 2 * us, ts ** 3), axis=1)
+
+
+def casteljau_split(bezier, t=0.5):
+    """
+    Subdivise des courbes de Bézier cubiques en deux à la valeur :param t: du paramètre
+    (algorithme de Casteljau).
+    :param bezier: Points de contrôle, tableau numpy de dimension (M, 2, 4)
+    :return        (gauche, droite) deux tableaux numpy de dimension (M, 2, 4) contenant
+                   les points de contrôle des deux moitiés de chaque courbe.
+    """
+    b01 = (1 - t) * bezier[:, :, 0] + t * bezier[:, :, 1]
+    b12 = (1 - t) * bezier[:, :, 1] + t * bezier[:, :, 2]
+    b23 = (1 - t) * bezier[:, :, 2] + t * bezier[:, :, 3]
+    b012 = (1 - t) * b01 + t * b12
+    b123 = (1 - t) * b12 + t * b23
+    milieu = (1 - t) * b012 + t * b123
+    gauche = np.stack((bezier[:, :, 0], b01, b012, milieu), axis=2)
+    droite = np.stack((milieu, b123, b23, bezier[:, :, 3]), axis=2)
+    return gauche, droite
+
+
+def ecart_corde(bezier, scale=None):
+    """
+    Calcule, pour des courbes de Bézier cubiques, la distance maximale de leurs
+    points de contrôle intérieurs à la corde (segment entre les extrémités).
+    D'après la propriété de l'enveloppe convexe, c'est un majorant de l'écart
+    entre la courbe et sa corde.
+    :param bezier: Points de contrôle, tableau numpy de dimension (M, 2, 4)
+    :param scale:  Si précisé, facteurs d'échelle (sx, sy) des deux axes, par exemple en pixels
+                   par unité: les distances sont alors mesurées après cette mise à l'échelle.
+    :return        Tableau numpy de dimension (M,)
+    """
+    if scale is not None:
+        bezier = bezier * np.asarray(scale, dtype=float)[np.newaxis, :, np.newaxis]
+    corde = bezier[:, :, 3] - bezier[:, :, 0]
+    longueur2 = np.sum(corde ** 2, axis=1)
+    interieurs = bezier[:, :, 1:3] - bezier[:, :, 0:1]
+    # Projection des points intérieurs sur la corde, ramenée au segment
+    # (au point de départ si la corde est de longueur nulle)
+    u = np.einsum('mi,mij->mj', corde, interieurs) / np.where(longueur2 > 0, longueur2, 1)[:, np.newaxis]
+    u = np.clip(u, 0, 1)
+    ecarts = interieurs - corde[:, :, np.newaxis] * u[:, np.newaxis, :]
+    return np.linalg.norm(ecarts, axis=1).max(axis=1)
+
+
+def subdivision_adaptative(bezier, tolerance, max_depth=16, scale=None):
+    """
+    Approche une suite de courbes de Bézier cubiques consécutives par une ligne brisée,
+    en subdivisant chaque courbe jusqu'à ce que son polygone de contrôle soit plat
+    à :param tolerance: près.
+    :param bezier:    Points de contrôle, tableau numpy de dimension (M, 2, 4)
+    :param tolerance: Ecart maximal entre la courbe et la ligne brisée.
+    :param max_depth: Nombre maximal de subdivisions successives d'une même courbe.
+    :param scale:     Si précisé, facteurs d'échelle (sx, sy) des deux axes (voir ecart_corde):
+                      :param tolerance: est alors exprimée dans ces unités, par exemple en pixels.
+    :return           Les sommets de la ligne brisée, tableau numpy de dimension (2, K)
+    """
+    for _ in range(max_depth):
+        a_diviser = ecart_corde(bezier, scale) > tolerance
+        if not a_diviser.any():
+            break
+        gauche, droite = casteljau_split(bezier[a_diviser])
+        # Chaque courbe à subdiviser est remplacée, à sa place, par ses deux moitiés
+        positions = np.cumsum(np.where(a_diviser, 2, 1)) - np.where(a_diviser, 2, 1)
+        nouveau = np.empty((positions[-1] + (2 if a_diviser[-1] else 1), 2, 4))
+        nouveau[positions[~a_diviser]] = bezier[~a_diviser]
+        nouveau[positions[a_diviser]] = gauche
+        nouveau[positions[a_diviser] + 1] = droite
+        bezier = nouveau
+    return np.concatenate((bezier[:, :, 0].T, bezier[-1:, :, 3].T), axis=1)
+
+
+def projection_bezier(bezier, point, iterations=4):
+    """
+    Calcule, pour des courbes de Bézier cubiques, le point de chaque courbe le plus
+    proche d'un point donné: une première estimation est obtenue par échantillonnage,
+    puis affinée par la méthode de Newton.
+    :param bezier:     Points de contrôle, tableau numpy de dimension (M, 2, 4)
+    :param point:      Point à projeter, de coordonnées (x, y)
+    :param iterations: Nombre d'itérations de la méthode de Newton.
+    :return            (distances, ts) deux tableaux numpy de dimension (M,): la distance
+                       de chaque courbe au point, et le paramètre (entre 0 et 1) où elle est atteinte.
+    """
+    # Coefficients de B(t) - P dans la base canonique: a0 + a1 t + a2 t^2 + a3 t^3
+    # (les calculs sont faits coordonnée par coordonnée, sur des tableaux de dimension (M,))
+    a = bezier @ BEZIER_VERS_CANONIQUE
+    a[:, :, 0] -= point
+    (ax0, ax1, ax2, ax3), (ay0, ay1, ay2, ay3) = a[:, 0].T, a[:, 1].T
+
+    # Estimation initiale
+    valeurs = a @ ECHANTILLONS_PUISSANCES
+    ts = ECHANTILLONS[np.argmin(valeurs[:, 0] ** 2 + valeurs[:, 1] ** 2, axis=1)]
+
+    # Méthode de Newton sur f(t) = (B(t) - P).B'(t), dont les zéros sont les extrema de |B(t) - P|
+    for _ in range(iterations):
+        ex, ey = ax0 + ts * (ax1 + ts * (ax2 + ts * ax3)), ay0 + ts * (ay1 + ts * (ay2 + ts * ay3))
+        dx, dy = ax1 + ts * (2 * ax2 + ts * 3 * ax3), ay1 + ts * (2 * ay2 + ts * 3 * ay3)
+        ddx, ddy = 2 * ax2 + ts * 6 * ax3, 2 * ay2 + ts * 6 * ay3
+        f = ex * dx + ey * dy
+        df = dx * dx + dy * dy + ex * ddx + ey * ddy
+        pas = np.divide(f, df, out=np.zeros_like(f), where=df > 0)
+        ts = np.clip(ts - pas, 0, 1)
+
+    ex, ey = ax0 + ts * (ax1 + ts * (ax2 + ts * ax3)), ay0 + ts * (ay1 + ts * (ay2 + ts * ay3))
+    return np.hypot(ex, ey), ts
@@ -8,7 +8,6 @@ entre deux points d'interpolation
 from algos.casteljau import casteljau
 import numpy as np
 from geom_utils.point import Point
-import matplotlib.pyplot as plt
 
 
 def first_derivative(p0: Point, p1: Point, m0: Point, m1: Point, t):
@@ -25,7 +24,7 @@ def first_derivative(p0: Point, p1: Point, m0: Point, m1: Point, t):
                 forme d'un tableau numpy [x, y]
     """
     pt0 = m0
-    pt1 = p1*3 - m0 - p0*3 - m0
+    pt1 = p1*3 - m1 - p0*3 - m0
     pt2 = m1
     pts_cntrl = np.array([[pt0.x, pt1.x, pt2.x], [pt0.y, pt1.y, pt2.y]])
     return casteljau(pts_cntrl, t)
@@ -71,10 +70,56 @@ def courbure(p0: Point, p1: Point, m0: Point, m1: Point, t):
     return det / denom
 
 
+def courbure_bezier(bezier, ts):
+    """
+    calcule la courbure de segments de Bézier cubiques
+    en plusieurs instants à la fois
+    :param bezier: tableau numpy de dimension (nb_segments, 2, 4) des points
+                   de contrôle de Bézier de chaque segment
+    :param ts:     tableau numpy de dimension (res,) des instants
+                   d'évaluation (entre 0 et 1)
+    :return        un tableau numpy K de dimension (nb_segments, res) où K[i, k]
+                   est la courbure du segment i à l'instant ts[k]
+    """
+    ts = np.asarray(ts, dtype=float)
+    # Points de contrôle des dérivées première (degré 2) et seconde (degré 1)
+    ctrl_prime = 3 * np.diff(bezier, axis=2)
+    ctrl_seconde = 2 * np.diff(ctrl_prime, axis=2)
+    base_prime = np.stack(((1 - ts) ** 2, 2 * ts * (1 - ts), ts ** 2))
+    base_seconde = np.stack((1 - ts, ts))
+    x_prime = np.einsum('sij,jk->sik', ctrl_prime, base_prime)
+    x_seconde = np.einsum('sij,jk->sik', ctrl_seconde, base_seconde)
+
+    det = np.abs(x_prime[:, 0] * x_seconde[:, 1] - x_prime[:, 1] * x_seconde[:, 0])
+    denom = np.linalg.norm(x_prime, axis=1) ** 3
+    # Si la dérivée est nulle, je suppose que la courbure aussi...
+    kappa = np.zeros_like(det)
+    np.divide(det, denom, out=kappa, where=denom != 0)
+    return kappa
+
+
+def courbure_segments(bezier, param_steps, res):
+    """
+    calcule la courbure d'une spline formée de segments de Bézier cubiques
+    :param bezier:      tableau numpy de dimension (nb_segments, 2, 4) des points
+                        de contrôle de Bézier de chaque segment
+    :param param_steps: bornes successives des intervalles du paramètre
+    :param res:         résolution de la courbure sur chaque segment
+    :return T, C: temps du tracé, et valeurs de la courbure à ces pas de temps
+    """
+    param_steps = np.asarray(param_steps, dtype=float)
+    temps = np.linspace(param_steps[:-1], param_steps[1:], res, axis=1).ravel()
+    courbe = courbure_bezier(bezier, np.arange(res) / res).ravel()
+    return temps, courbe
+
+
 def trace_courbure(p0, p1, m0, m1, res):
     """
     Affiche la fonction de courbure
     """
+    # Import local: le calcul de la courbure ne dépend pas de matplotlib
+    import matplotlib.pyplot as plt
+
     valeurs = []
     for t in np.linspace(0, 1, res):
         valeurs.append(courbure(p0, p1, m0, m1, t))
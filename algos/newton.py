@@ -0,0 +1,44 @@
+"""
+Implémente la forme de Newton du polynôme d'interpolation de Lagrange
+(différences divisées), ainsi que l'évaluation de ses dérivées.
+"""
+
+import numpy as np
+
+
+def differences_divisees(pts, tps):
+    """
+    Calcule les coefficients de Newton du polynôme d'interpolation.
+    :param pts: les points d'interpolation (tableau numpy de dimension (2, n))
+    :param tps: les paramètres associés (n valeurs distinctes)
+    :return:    un tableau numpy C de dimension (2, n) tel que
+                P(t) = C[:, 0] + (t - tps[0]) C[:, 1] + (t - tps[0])(t - tps[1]) C[:, 2] + ...
+    """
+    tps = np.asarray(tps, dtype=float)
+    coefs = np.array(pts, dtype=float)
+    n = coefs.shape[1]
+    for k in range(1, n):
+        coefs[:, k:] = (coefs[:, k:] - coefs[:, k - 1:n - 1]) / (tps[k:] - tps[:n - k])
+    return coefs
+
+
+def newton_derivees(coefs, tps, ts):
+    """
+    Evalue le polynôme de Newton ainsi que ses dérivées première et seconde
+    en tous les instants de :param ts: (schéma de Horner).
+    :param coefs: les coefficients de Newton (voir differences_divisees)
+    :param tps:   les paramètres d'interpolation
+    :param ts:    les instants d'évaluation (tableau numpy de dimension (res,))
+    :return:      (P, P', P'') trois tableaux numpy de dimension (2, res)
+    """
+    ts = np.asarray(ts, dtype=float)
+    n = coefs.shape[1]
+    valeur = np.repeat(coefs[:, n - 1:n], ts.shape[0], axis=1)
+    derivee = np.zeros_like(valeur)
+    derivee_seconde = np.zeros_like(valeur)
+    for k in range(n - 2, -1, -1):
+        ecart = ts - tps[k]
+        derivee_seconde = derivee_seconde * ecart + 2 * derivee
+        derivee = derivee * ecart + valeur
+        valeur = valeur * ecart + coefs[:, k:k + 1]
+    return valeur, derivee, derivee_seconde
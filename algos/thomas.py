@@ -0,0 +1,44 @@
+"""
+Implémente l'algorithme de Thomas (résolution des systèmes tridiagonaux).
+"""
+
+import numpy as np
+
+
+def thomas(lower, diag, upper, rhs):
+    """
+    Résout le système tridiagonal A X = Y en O(N), sans jamais construire A.
+    :param lower: sous-diagonale de A, tableau numpy de dimension (N - 1,)
+    :param diag:  diagonale de A, tableau numpy de dimension (N,)
+    :param upper: sur-diagonale de A, tableau numpy de dimension (N - 1,)
+    :param rhs:   second membre Y, de dimension (N,) ou (N, K) pour résoudre
+                  K systèmes de même matrice à la fois
+    :return:      la solution X, de même dimension que :param rhs:
+    """
+    n = len(diag)
+    lower, diag, upper = lower.tolist(), diag.tolist(), upper.tolist()
+
+    # Elimination de la sous-diagonale: les coefficients ne dépendent que de A,
+    # ils sont donc calculés une seule fois pour tous les seconds membres.
+    # (Les boucles travaillent sur des flottants Python, bien plus rapides que
+    # des opérations numpy élément par élément.)
+    upper_prime = [0.0] * n
+    inv_denom = [1 / diag[0]] * n
+    for i in range(1, n):
+        upper_prime[i - 1] = upper[i - 1] * inv_denom[i - 1]
+        inv_denom[i] = 1 / (diag[i] - lower[i - 1] * upper_prime[i - 1])
+
+    rhs = np.asarray(rhs, dtype=float)
+    solution = np.empty_like(rhs)
+    colonnes = rhs.reshape(n, -1)
+    for k in range(colonnes.shape[1]):
+        x = colonnes[:, k].tolist()
+        # Descente
+        x[0] *= inv_denom[0]
+        for i in range(1, n):
+            x[i] = (x[i] - lower[i - 1] * x[i - 1]) * inv_denom[i]
+        # Remontée
+        for i in range(n - 2, -1, -1):
+            x[i] -= upper_prime[i] * x[i + 1]
+        solution.reshape(n, -1)[:, k] = x
+    return solution
@@ -0,0 +1,207 @@
+"""
+Suite de mesures de performance, sans interface graphique.
+
+Mesure le temps de calcul des points et de la courbure de chaque type de courbe, de
+compute_derivatives, et d'une suite de Drag & Drop simulés sur un Plotter. Les résultats
+sont écrits au format JSON, et peuvent être comparés à ceux d'une exécution précédente:
+les mesures plus lentes que la référence au-delà d'un certain seuil sont signalées.
+
+Utilisation:
+    python benchmark.py --output reference.json
+    python benchmark.py --baseline reference.json --threshold 0.2
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+from types import SimpleNamespace
+from plotter import Plotter
+from courbes.catalogue import curves_constructors
+from courbes.splines_c2 import compute_derivatives
+from courbes.hermite_cubique import CourbeHermiteCubique
+from geom_utils.point import Point, PointArray
+from courbes.courbe import Courbe
+from instrumentation import tracer, instrument_curves
+
+"""
+Number of control points of the curves of each benchmark. The Lagrange interpolation
+is limited to small numbers of points, its evaluation being quadratic.
+"""
+SIZES = {'Cubic Hermite Spline': (10, 100, 1000),
+         'C2 Spline': (10, 100, 1000),
+         'Lagrange Interpolation': (10, 50)}
+
+"""
+Resolutions at which the points of each curve are computed
+"""
+RESOLUTIONS = (1000, 10000, 100000)
+
+"""
+Number of points for which compute_derivatives is benchmarked
+"""
+DERIVATIVES_SIZES = (1000, 100000)
+
+
+def random_curve(type_name, nb_points, seed=0):
+    """
+    Creates a curve of the given type interpolating random points, always the same for a given seed.
+    """
+    rng = np.random.default_rng(seed)
+    points = np.cumsum(rng.random((2, nb_points)) - 0.5, axis=1)
+    return curves_constructors[type_name](PointArray(points), np.arange(nb_points, dtype=float))
+
+
+def measure(setup, run, repeat):
+    """
+    Times a function.
+    :param setup:   Function called before each measure, whose result is given to run.
+                    Its duration isn't measured.
+    :param run:     Function to time.
+    :param repeat:  Number of measures.
+    :return: A map {'min': ..., 'median': ...} of the durations, in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        durations.append(time.perf_counter() - start)
+    return {'min': min(durations), 'median': float(np.median(durations))}
+
+
+def drag_loop(type_name, nb_points, nb_events=50):
+    """
+    Creates a Plotter containing a curve, then returns a function simulating a Drag & Drop
+    of its middle control point over nb_events mouse positions, redrawn by blitting
+    as in the application (see Interface.render_frame).
+    """
+    def setup():
+        plotter = Plotter()
+        plotter.add_curve(random_curve(type_name, nb_points))
+        plotter.select_curve(list(plotter.courbes().keys())[0])
+        plotter.fig.canvas.draw()
+        plotter.picked_ctrl_point = nb_points // 2
+        plotter.start_blit()
+        start = plotter.selected_curve.control_points()[:, nb_points // 2]
+        events = [SimpleNamespace(xdata=start[0] + 0.01 * k, ydata=start[1] - 0.01 * k) for k in range(nb_events)]
+        return plotter, events
+
+    def run(state):
+        plotter, events = state
+        for event in events:
+            plotter.drag_event(event)
+            plotter.blit()
+
+    return setup, run
+
+
+def benchmarks():
+    """
+    :return: A list of (name, setup, run) of all the benchmarks.
+    """
+    cases = []
+    for type_name, sizes in SIZES.items():
+        for nb_points in sizes:
+            for res in RESOLUTIONS:
+                cases.append(("points/{}/{}/{}".format(type_name, nb_points, res),
+                              lambda type_name=type_name, nb_points=nb_points: random_curve(type_name, nb_points),
+                              lambda curve, res=res: curve.points(res)))
+            cases.append(("plot_bending/{}/{}".format(type_name, nb_points),
+                          lambda type_name=type_name, nb_points=nb_points: random_curve(type_name, nb_points),
+                          lambda curve: curve.plot_bending(100)))
+        nb_points = sizes[-1]
+        cases.append(("drag_event/{}/{}".format(type_name, nb_points),) + drag_loop(type_name, nb_points))
+
+    for res in RESOLUTIONS:
+        cases.append(("points/Cubic Hermite Curve/{}".format(res),
+                      lambda: CourbeHermiteCubique(Point(0, 0), Point(1, 1), Point(1, 0), Point(0, 1)),
+                      lambda curve, res=res: curve.points(res)))
+
+    for nb_points in DERIVATIVES_SIZES:
+        cases.append(("compute_derivatives/{}".format(nb_points),
+                      lambda nb_points=nb_points: np.random.default_rng(0).random((2, nb_points)),
+                      compute_derivatives))
+    return cases
+
+
+def run_benchmarks(repeat, selection=None):
+    """
+    Runs the benchmarks.
+    :param repeat:      Number of measures of each benchmark.
+    :param selection:   If given, only the benchmarks whose name contains this string are run.
+    :return: The results, as a map which can be written as JSON.
+    """
+    results = {}
+    for name, setup, run in benchmarks():
+        if selection is not None and selection not in name:
+            continue
+        results[name] = measure(setup, run, repeat)
+        print("{:<50} {:>10.3f} ms".format(name, results[name]['min'] * 1000))
+    return {'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                            'matplotlib': matplotlib.__version__, 'machine': platform.machine(),
+                            'system': platform.system()},
+            'repeat': repeat,
+            'results': results}
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results to a baseline, using the minimum duration of each benchmark.
+    :param threshold: Relative slow down above which a benchmark is flagged as a regression.
+    :return: The list of (name, baseline duration, new duration) of the regressions.
+    """
+    regressions = []
+    for name, measures in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        old, new = baseline['results'][name]['min'], measures['min']
+        ratio = new / old if old > 0 else np.inf
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print("{:<50} {:>10.3f} ms -> {:>10.3f} ms  x{:<6.2f} {}".format(name, old * 1000, new * 1000, ratio, flag))
+        if flag:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the performance benchmarks, without any GUI.")
+    parser.add_argument("--output", help="File in which the results are written, as JSON")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare to")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slow down flagged as a regression (default: 0.2, i.e. 20%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measures of each benchmark")
+    parser.add_argument("--select", help="Only runs the benchmarks whose name contains this string")
+    parser.add_argument("--trace", help="Records the stages of the benchmarks into this Chrome trace file")
+    args = parser.parse_args()
+
+    if args.trace is not None:
+        instrument_curves(Courbe)
+        tracer.enable()
+    results = run_benchmarks(args.repeat, args.select)
+    if args.trace is not None:
+        print()
+        tracer.print_summary()
+        tracer.export_chrome_trace(args.trace)
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        print("{} regression(s).".format(len(regressions)))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
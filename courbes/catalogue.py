@@ -0,0 +1,89 @@
+"""
+Catalogue des types de courbes pouvant être créés par l'utilisateur.
+Les modules des courbes ne sont importés que lorsque leur type est utilisé.
+"""
+
+import importlib
+from collections.abc import Mapping
+from geom_utils.point import PointArray
+
+
+class CurvesRegistry(Mapping):
+    """
+    Dictionnaire {nom du type: constructeur} dont les constructeurs (classes de courbes)
+    sont importés lors de leur premier accès. Les noms des types peuvent être parcourus,
+    et testés avec "in", sans rien importer.
+    """
+    def __init__(self, types):
+        """
+        :param types: Map {type name: (module name, class name)}.
+        """
+        self.types = dict(types)
+        self.constructors = dict()
+
+    def register(self, type_name, module_name, class_name):
+        """
+        Adds a type of curve to the registry, without importing its module.
+        """
+        self.types[type_name] = (module_name, class_name)
+        self.constructors.pop(type_name, None)
+
+    def type_name(self, curve_class):
+        """
+        :return: The name under which a curve class is registered, or None. No module is imported.
+        """
+        for type_name, (module_name, class_name) in self.types.items():
+            if curve_class.__module__ == module_name and curve_class.__name__ == class_name:
+                return type_name
+        return None
+
+    def __getitem__(self, type_name):
+        if type_name not in self.constructors:
+            module_name, class_name = self.types[type_name]
+            self.constructors[type_name] = getattr(importlib.import_module(module_name), class_name)
+        return self.constructors[type_name]
+
+    def __contains__(self, type_name):
+        return type_name in self.types
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def __len__(self):
+        return len(self.types)
+
+
+"""
+Constructors for types of curves that can be created by the user
+"""
+curves_constructors = CurvesRegistry({'Cubic Hermite Spline': ("courbes.spline_hermite_cubique", "SplineHermiteCubique"),
+                                      'Lagrange Interpolation': ("courbes.lagrange", "CourbeLagrange"),
+                                      'C2 Spline': ("courbes.splines_c2", "SplineC2")})
+
+
+def curve_type_name(curve):
+    """
+    :return: The name of the curve's type in curves_constructors, or None if it
+             can't be created from the catalogue.
+    """
+    return curves_constructors.type_name(type(curve))
+
+
+def build_curve(type_name, control_points, params, hyperparameters):
+    """
+    Creates a curve from plain arrays.
+    :param type_name:       Name of the curve's type in curves_constructors.
+    :param control_points:  Numpy array of shape (2, number of points).
+    :param params:          Numpy array of the parameters associated to the points.
+    :param hyperparameters: Map {name: value} of the curve's hyperparameters.
+    """
+    return curves_constructors[type_name](PointArray(control_points), params, **hyperparameters)
+
+
+def evaluate_curve(type_name, control_points, params, hyperparameters, res):
+    """
+    Creates a curve from plain arrays (see build_curve) and computes its points.
+    Used by the worker processes of the Plotter, to which only arrays are sent.
+    :return: The curve's points at resolution res, as a numpy array of shape (2, res).
+    """
+    return build_curve(type_name, control_points, params, hyperparameters).points(res)
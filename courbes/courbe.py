@@ -4,7 +4,7 @@ Implémente la classe générique Courbe.
 
 
 import numpy as np
-from geom_utils.point import Point
+from geom_utils.point import PointArray
 
 
 class Courbe:
@@ -14,7 +14,35 @@ class Courbe:
       la courbe ET ses paramètres.
     - être calculée: la Courbe doit nécessairement implémenter la méthode points() pour
       permettre à un agent externe de la tracer.
+    Chaque modification de la courbe incrémente sa version (voir mark_modified), ce qui
+    permet aux agents externes de savoir si des points déjà calculés sont encore valides.
     """
+    # Version de la courbe
+    version = 0
+    # Fonction appliquée aux méthodes points et plot_bending de chaque type de courbe, par
+    # exemple pour mesurer leur durée: elle est fournie par l'application (voir
+    # instrumentation.instrument_curves). Par défaut, les méthodes ne sont pas modifiées.
+    method_wrapper = None
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Wraps the points and plot_bending methods of the types of curves defined after
+        Courbe.method_wrapper was given (see wrap_methods).
+        """
+        super().__init_subclass__(**kwargs)
+        if Courbe.method_wrapper is not None:
+            Courbe.wrap_methods(cls)
+
+    @staticmethod
+    def wrap_methods(cls):
+        """
+        Replaces the points and plot_bending methods defined by a type of curve with
+        Courbe.method_wrapper(method, "Courbe." + name).
+        """
+        for name in ("points", "plot_bending"):
+            if name in cls.__dict__:
+                setattr(cls, name, Courbe.method_wrapper(cls.__dict__[name], "Courbe." + name))
+
     def __init__(self, points, **parameters):
         """
         :param points   Itérable contenant des couples (x, y) définissant les points
@@ -33,12 +61,47 @@ class Courbe:
         """
         pass
 
+    def iter_points(self, res: int, chunk_size: int = 2 ** 16):
+        """
+        Calcule la courbe par morceaux: génère des matrices numpy de dimensions
+        (2, chunk_size), la dernière pouvant être plus courte, dont la concaténation
+        est égale à self.points(res).
+        Cette implémentation par défaut calcule tous les points d'un coup: les types de
+        courbes la redéfinissent pour n'évaluer qu'un morceau à la fois, en mémoire bornée.
+        :param res          Résolution demandée pour le tracé.
+        :param chunk_size   Nombre de points de chaque morceau.
+        """
+        points = self.points(res)
+        for start in range(0, points.shape[1], chunk_size):
+            yield points[:, start:start + chunk_size]
+
+    def bezier_segments(self):
+        """
+        :return: If the curve is made of cubic Bezier segments, their control points
+                 as a numpy array of shape (nb_segments, 2, 4). Otherwise, None.
+        """
+        return None
+
+    def segment_parameter(self, segment, t):
+        """
+        :param segment: Index of a Bezier segment of the curve (see bezier_segments).
+        :param t:       Local parameter on this segment, between 0 and 1.
+        :return: The corresponding value of the curve's parameter.
+        """
+        return self.params[segment] + t * (self.params[segment + 1] - self.params[segment])
+
     def get_type(self):
         """
         :return: The type of this curve as a string.
         """
         return self.curve_type
 
+    def mark_modified(self):
+        """
+        Increments this curve's version. Must be called by every method that modifies the curve.
+        """
+        self.version += 1
+
     def control_points(self):
         """
         :return: The curve's control points as a 2D numpy array
@@ -48,10 +111,10 @@ class Courbe:
 
     def control_points_as_points(self):
         """
-        Iterates over this curve's control points as Point objects
+        :return: A copy of this curve's control points as a PointArray, which
+                 can be indexed or iterated over as Point objects.
         """
-        for k in range(self.control_points_.shape[1]):
-            yield Point(self.control_points_[0, k], self.control_points_[1, k])
+        return PointArray(self.control_points_.copy())
 
     def hyperparameters_values(self):
         """
@@ -75,4 +138,5 @@ class Courbe:
         """
         init_params = self.hyperparameters_values()
         init_params[parameter_name] = value
-        self.__init__(list(self.control_points_as_points()), self.params, **init_params)
\ No newline at end of file
+        self.__init__(self.control_points_as_points(), self.params, **init_params)
+        self.mark_modified()
\ No newline at end of file
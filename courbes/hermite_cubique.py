@@ -5,11 +5,144 @@ Voir Courbe pour de plus amples informations.
 
 
 import numpy as np
-from algos.casteljau import casteljau
+from algos.casteljau import bernstein_cubique, subdivision_adaptative
 from courbes.courbe import Courbe
 from geom_utils.point import Point, points_to_array
 
 
+def hermite_to_bezier(points, tans):
+    """
+    Calcule les points de Bézier de tous les segments d'une spline d'Hermite cubique.
+    :param points:  Tableau numpy de dimension (2, N) des points interpolés.
+    :param tans:    Tableau numpy de dimension (2, N) des tangentes en ces points.
+    :return:        Un tableau numpy B de dimension (N - 1, 2, 4) où B[k] contient les
+                    4 points de contrôle de Bézier du segment entre les points k et k + 1.
+    """
+    bezier = np.empty((points.shape[1] - 1, 2, 4))
+    bezier[:, :, 0] = points[:, :-1].T
+    bezier[:, :, 1] = (points[:, :-1] + tans[:, :-1] / 3).T
+    bezier[:, :, 2] = (points[:, 1:] - tans[:, 1:] / 3).T
+    bezier[:, :, 3] = points[:, 1:].T
+    return bezier
+
+
+def segments_params(nb_segments, res, start=0, stop=None):
+    """
+    Répartit :param res: échantillons uniformément sur :param nb_segments: segments
+    consécutifs, sans dupliquer les points de raccord.
+    :param start, stop: Si précisés, seuls les échantillons start..stop-1 sont calculés.
+    :return: (indices, ts) deux tableaux numpy de dimension (stop - start,) tels que l'échantillon
+             start + k correspond au segment indices[k] évalué au paramètre local ts[k] (entre 0 et 1).
+    """
+    stop = res if stop is None else stop
+    # Equivalent à np.linspace(0, nb_segments, res)[start:stop], sans calculer
+    # les échantillons hors de la fenêtre
+    global_params = np.arange(start, stop) * (nb_segments / max(res - 1, 1))
+    if stop == res and res > 1:
+        global_params[-1] = nb_segments
+    indices = np.minimum(global_params.astype(int), nb_segments - 1)
+    return indices, global_params - indices
+
+
+def bezier_segments_points(bezier, res):
+    """
+    Evalue une suite de segments de Bézier cubiques en exactement :param res: points.
+    :param bezier:  Tableau numpy de dimension (nb_segments, 2, 4), voir hermite_to_bezier.
+    :param res:     Nombre total de points à calculer.
+    :return:        Un tableau numpy P de dimension (2, res).
+    """
+    indices, ts = segments_params(bezier.shape[0], res)
+    # Une seule contraction entre les points de contrôle de chaque échantillon
+    # et la base de Bernstein évaluée en son paramètre local
+    return np.einsum('kij,kj->ik', bezier[indices], bernstein_cubique(ts))
+
+
+def update_segments_points(bezier, samples, first, last):
+    """
+    Recalcule en place, dans un tableau obtenu par bezier_segments_points, les seuls
+    échantillons appartenant aux segments first..last (inclus).
+    :param bezier:  Tableau numpy de dimension (nb_segments, 2, 4) à jour.
+    :param samples: Tableau numpy de dimension (2, res) à mettre à jour.
+    """
+    nb_segments, res = bezier.shape[0], samples.shape[1]
+    # Fenêtre d'échantillons couvrant les segments visés. Elle est volontairement un
+    # peu large: les échantillons voisins recalculés en trop restent exacts.
+    step = (res - 1) / nb_segments
+    start = max(0, int(first * step) - 1)
+    stop = min(res, int((last + 1) * step) + 2)
+    indices, ts = segments_params(nb_segments, res, start, stop)
+    samples[:, start:stop] = np.einsum('kij,kj->ik', bezier[indices], bernstein_cubique(ts))
+
+
+def iter_bezier_segments_points(bezier, res, chunk_size):
+    """
+    Evalue une suite de segments de Bézier cubiques en :param res: points, par morceaux
+    de :param chunk_size: points, sans jamais calculer plus d'un morceau à la fois.
+    :param bezier:  Tableau numpy de dimension (nb_segments, 2, 4), voir hermite_to_bezier.
+    :return:        Un générateur de tableaux numpy de dimension (2, chunk_size) (le dernier
+                    pouvant être plus court), dont la concaténation est égale à
+                    bezier_segments_points(bezier, res).
+    """
+    for start in range(0, res, chunk_size):
+        indices, ts = segments_params(bezier.shape[0], res, start, min(start + chunk_size, res))
+        yield np.einsum('kij,kj->ik', bezier[indices], bernstein_cubique(ts))
+
+
+class SegmentsSamples:
+    """
+    Derniers points calculés d'une suite de segments de Bézier cubiques (voir bezier_segments_points),
+    mis à jour en place lorsque seuls quelques segments ont changé (voir update_segments_points).
+    Deux tableaux préalloués sont utilisés alternativement: chaque mise à jour est faite dans celui
+    qui n'a pas été renvoyé en dernier, après y avoir rattrapé les segments modifiés depuis qu'il
+    était à jour. Un tableau renvoyé n'est donc pas modifié par la mise à jour suivante, mais
+    seulement par celle d'après. Les tableaux renvoyés sont en lecture seule.
+    """
+    def __init__(self):
+        # Tableau renvoyé en dernier, et autre tableau (None tant qu'il n'a pas été alloué)
+        self.front, self.back = None, None
+        # Intervalles (premier, dernier) des segments modifiés depuis la dernière mise à jour,
+        # et depuis que self.back était à jour
+        self.dirty, self.back_dirty = None, None
+
+    def mark_dirty(self, first, last):
+        """
+        Remembers that the segments first..last (inclusive) have changed.
+        """
+        self.dirty = union_segments(self.dirty, first, last)
+        self.back_dirty = union_segments(self.back_dirty, first, last)
+
+    def update(self, bezier, res):
+        """
+        :param bezier:  Tableau numpy de dimension (nb_segments, 2, 4) à jour.
+        :param res:     Nombre total de points.
+        :return:        Les points des segments, tableau numpy de dimension (2, res) en lecture seule.
+        """
+        if self.front is None or self.front.shape[1] != res:
+            self.front, self.back = bezier_segments_points(bezier, res), None
+            self.front.flags.writeable = False
+        elif self.dirty is not None:
+            if self.back is None:
+                # Allocation du second tableau, qui est alors dans le même état que le premier
+                self.back, self.back_dirty = self.front.copy(), self.dirty
+            self.back.flags.writeable = True
+            update_segments_points(bezier, self.back, *self.back_dirty)
+            self.back.flags.writeable = False
+            # Le tableau précédent n'a pas reçu les modifications qui viennent d'être rattrapées
+            self.front, self.back, self.back_dirty = self.back, self.front, self.dirty
+        self.dirty = None
+        return self.front
+
+
+def union_segments(segments, first, last):
+    """
+    :return: The smallest interval (first, last) of segments containing both :param segments:
+             (an interval, or None) and first..last.
+    """
+    if segments is None:
+        return first, last
+    return min(first, segments[0]), max(last, segments[1])
+
+
 class CourbeHermiteCubique(Courbe):
     """
     Une courbe d'Hermite cubique permet d'interpoler deux points P0, P1
@@ -45,22 +178,53 @@ class CourbeHermiteCubique(Courbe):
             [self.p0[1], self.p0[1] + (1 / 3) * self.m0[1], self.p1[1] - (1 / 3) * self.m1[1], self.p1[1]]
         ])
 
-    def points(self, res):
+    def points(self, res=100, tolerance=None, scale=None):
         """
         Calcule la courbe et renvoie les points calculées sous la forme
         d'une matrice numpy P de dimensions (2, res) où P[:, i] correspond
         au point numéro i.
         :param res  Résolution demandée pour le tracé.
+        :param tolerance    Si précisée, la courbe est échantillonnée de manière adaptative
+                            (et :param res: est ignoré): les points renvoyés forment une ligne
+                            brisée qui s'écarte de la courbe d'au plus :param tolerance:.
+        :param scale        Facteurs d'échelle (sx, sy) des deux axes, en pixels par unité par exemple:
+                            si précisés, :param tolerance: est exprimée dans ces unités (voir ecart_corde).
         """
+        if tolerance is not None:
+            return subdivision_adaptative(self.bezier_segments(), tolerance, scale=scale)
+
         # Valeurs du paramètre auxquelles la courbe va être évaluée
         param_vals = np.linspace(*self.param_interval, res)
 
-        # Matrice résultat
-        P = np.zeros((2, res))
+        # Calcul de tous les points en un seul produit matriciel avec la base de Bernstein:
+        # P[:, k] = somme_i bezierPoints[:, i] * B_i(param_vals[k])
+        return self.bezierPoints @ bernstein_cubique(param_vals).T
+
+    def iter_points(self, res, chunk_size=2 ** 16):
+        """
+        Calcule la courbe par morceaux de :param chunk_size: points (voir Courbe.iter_points).
+        """
+        first, last = self.param_interval
+        step = (last - first) / max(res - 1, 1)
+        for start in range(0, res, chunk_size):
+            stop = min(start + chunk_size, res)
+            # Mêmes valeurs du paramètre que np.linspace(first, last, res)[start:stop]
+            param_vals = np.arange(start, stop) * step + first
+            if stop == res and res > 1:
+                param_vals[-1] = last
+            yield self.bezierPoints @ bernstein_cubique(param_vals).T
 
-        # Calcul des points à l'aide de l'algorithme de Casteljau
-        for k in range(res):
-            # P[:, k] = colonne numéro k de P (et donc le point numéro k)
-            P[:, k] = casteljau(self.bezierPoints, param_vals[k])
+    def bezier_segments(self):
+        """
+        :return: Les points de contrôle de Bézier de la courbe, sous la forme
+                 d'un tableau numpy de dimension (1, 2, 4).
+        """
+        return self.bezierPoints[np.newaxis]
 
-        return P
+    def segment_parameter(self, segment, t):
+        """
+        :return: La valeur du paramètre de la courbe correspondant au paramètre local
+                 :param t: de son unique segment de Bézier.
+        """
+        a, b = self.param_interval
+        return a + t * (b - a)
@@ -1,5 +1,7 @@
-import numpy as np
-from algos.courbure import courbure
+from algos.courbure import courbure_segments
+from courbes.hermite_cubique import hermite_to_bezier
+from courbes.spline_hermite_cubique import estimate_tangents
+from geom_utils.point import PointArray, points_to_array
 
 
 class CourbeKappa:
@@ -17,15 +19,10 @@ class CourbeKappa:
                             correspond à une répartition équidistante.
         :param tension      paramètre de tension des tangentes
         """
-        self.pts = pts
+        self.pts = PointArray(points_to_array(pts))
         self.param_steps = param_steps
-        # Estimation des tangeantes (Les extrémités sont approximées par des tangeantes nulles)
-        tans = [(pts[1] - pts[0])/(param_steps[1] - param_steps[0])]
-        for k in range(1, len(pts) - 1):
-            tans.append(
-                (pts[k + 1] - pts[k - 1]) * (1 - tension) / (param_steps[k + 1] - param_steps[k - 1]))
-        tans.append((pts[-1] - pts[-2])/(param_steps[-1] - param_steps[-2]))
-        self.tans = tans
+        # Estimation des tangeantes (Les extrémités sont approximées par le taux d'accroissement)
+        self.tans = PointArray(estimate_tangents(self.pts.coords, param_steps, tension, "approximated"))
 
     def trace(self, res):
         """
@@ -34,13 +31,5 @@ class CourbeKappa:
                         points d'interpolation
         :return T, C: temps du tracé, et valeurs de la courbure à ces pas de temps
         """
-        temps = np.zeros((len(self.param_steps)-1)*res)
-        courbe = np.zeros((len(self.pts)-1)*res)
-        for i in range(len(self.param_steps)-1):
-            lin_steps = np.linspace(self.param_steps[i], self.param_steps[i+1], res)
-            for j in range(res):
-                temps[i*res + j] = lin_steps[j]
-            for n in range(res):
-                t = n/res
-                courbe[i*res + n] = courbure(self.pts[i], self.pts[i+1], self.tans[i], self.tans[i+1], t)
-        return temps, courbe
\ No newline at end of file
+        bezier = hermite_to_bezier(self.pts.coords, self.tans.coords)
+        return courbure_segments(bezier, self.param_steps, res)
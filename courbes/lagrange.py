@@ -5,8 +5,9 @@ Defines the Lagrange interpolation curve.
 
 import numpy as np
 from courbes.courbe import Courbe
-from algos.aitken_neville import aitken_neville
-from geom_utils.point import points_to_array, from_numpy_array, Point
+from algos.aitken_neville import aitken_neville_vect
+from algos.barycentrique import poids_barycentriques, barycentrique
+from geom_utils.point import points_to_array, Point
 from courbes.courbure_lagrange import CourbureLagrange
 
 
@@ -14,11 +15,12 @@ class CourbeLagrange(Courbe):
     """
     Polynome de degré n interpolant n points
     """
-    def __init__(self, points, params):
+    def __init__(self, points, params, **parameters):
         """
         :param points: les points d'interpolation (tableau de Point)
         :param params: les paramètres associés
-        :param res: résolution de la courbe entre deux points
+        :param evaluation: Algorithme d'évaluation de la courbe. Peut être "barycentric" (défaut)
+                           ou "neville".
         (P(ti) = Pi)
         """
         super().__init__(points)
@@ -26,19 +28,43 @@ class CourbeLagrange(Courbe):
         self.control_points_ = points_to_array(points)
         self.params = params
 
+        if "evaluation" in parameters:
+            self.evaluation = parameters["evaluation"]
+        else:
+            self.evaluation = "barycentric"
+
+        # Les poids barycentriques ne dépendent que des paramètres: ils restent
+        # valables lorsque les points de contrôle sont déplacés.
+        self.poids = poids_barycentriques(params)
+
     def points(self, res=100):
         """
         Calcule tous les points de la courbe polynomiale
         selon la résolution et les renvoie dans une matrice
         de taille 2xn
         """
-        points = np.zeros((2, res+1))
-        for k in range(res + 1):
-            alpha = k/res
-            t = (1 - alpha)*self.params[0] + alpha*self.params[-1]
-            eval_en_t = aitken_neville(from_numpy_array(self.control_points_), self.params, t)
-            points[:, k] = [eval_en_t[0], eval_en_t[1]]
-        return points
+        ts = np.linspace(self.params[0], self.params[-1], res + 1)
+        if self.evaluation == "neville":
+            return aitken_neville_vect(self.control_points_, self.params, ts)
+        return barycentrique(self.control_points_, self.params, self.poids, ts)
+
+    def iter_points(self, res, chunk_size=2 ** 16):
+        """
+        Calcule les res + 1 points de la courbe par morceaux de :param chunk_size: points
+        (voir Courbe.iter_points). Seuls les instants d'un morceau sont calculés à la fois.
+        """
+        first, last = self.params[0], self.params[-1]
+        step = (last - first) / res
+        for start in range(0, res + 1, chunk_size):
+            stop = min(start + chunk_size, res + 1)
+            # Mêmes instants que np.linspace(first, last, res + 1)[start:stop]
+            ts = np.arange(start, stop) * step + first
+            if stop == res + 1:
+                ts[-1] = last
+            if self.evaluation == "neville":
+                yield aitken_neville_vect(self.control_points_, self.params, ts)
+            else:
+                yield barycentrique(self.control_points_, self.params, self.poids, ts)
 
     def plot_bending(self, res):
         """
@@ -46,19 +72,31 @@ class CourbeLagrange(Courbe):
         et des valeurs associées, sous la forme de deux tableaux
         :return     les temps, les valeurs
         """
-        return CourbureLagrange(list(self.control_points_as_points()), self.params).trace(res)
+        return CourbureLagrange(self.control_points_, self.params).trace(res)
 
     def set_control_point(self, pt_index, value: Point):
         """
         Modifies the value of the (pt_index)th control point.
-        Implies recomputing the whole curve.
+        The barycentric weights only depend on the params, so they
+        are kept as is.
         :param pt_index: Index of the control point to modify
                          in self.control_points()
         :param value:    new value for the control point
         """
-        # Get the current control points
-        points = list(self.control_points_as_points())
-        # Replace the value for the aimed control point
-        points[pt_index] = value
-        # Recreate the curve with the new control points
-        self.__init__(points, self.params)
+        self.mark_modified()
+        self.control_points_[:, pt_index] = (value.x, value.y)
+
+    def hyperparameters_values(self):
+        """
+        Returns a map of the curve's parameters along with their values.
+        """
+        return {'evaluation': self.evaluation}
+
+    def hyperparameters(self):
+        """
+        An Hyperparameter is a parameter that controls the curve but isn't a parameter
+        of evalutation of the curve (For example: the tension for a cubic hermite spline).
+        :return: A map of the parameters and values they can take. When those values are float, a tuple
+                    (limit_inf, limit_sup, nb_of_values) is given, otherwise, a tuple of the possible values.
+        """
+        return {"evaluation": ("barycentric", "neville")}
@@ -8,9 +8,37 @@ from builtins import map
 
 import numpy as np
 from courbes.courbe import Courbe
-from courbes.hermite_cubique import CourbeHermiteCubique
+from courbes.hermite_cubique import hermite_to_bezier, iter_bezier_segments_points, SegmentsSamples
 from geom_utils.point import Point, points_to_array
-from algos.courbure import courbure
+from algos.casteljau import subdivision_adaptative
+from algos.courbure import courbure_segments
+
+
+def estimate_tangents(points, param_steps, tension, tangent, first=0, last=None):
+    """
+    Estimates the tangents of a cubic hermite spline at its interpolation points.
+    :param points:      Interpolation points as a numpy array of shape (2, N).
+    :param param_steps: Parameters associated to the points.
+    :param tension:     The curve tension.
+    :param tangent:     Ends' tangent computation, "zero" or "approximated" (see SplineHermiteCubique).
+    :param first, last: If given, only the tangents first..last (included) are computed.
+    :return: A numpy array of shape (2, last - first + 1) containing the tangents.
+    """
+    n = points.shape[1]
+    last = n - 1 if last is None else last
+    param_steps = np.asarray(param_steps, dtype=float)
+
+    indices = np.arange(first, last + 1)
+    previous, following = np.maximum(indices - 1, 0), np.minimum(indices + 1, n - 1)
+    tans = (points[:, following] - points[:, previous]) / (param_steps[following] - param_steps[previous])
+
+    # Inner tangents are scaled by the tension, the ends' ones are either the growth
+    # rate between the two points at each end, or zero.
+    inner = (indices > 0) & (indices < n - 1)
+    tans[:, inner] *= (1 - tension)
+    if tangent != "approximated":
+        tans[:, ~inner] = 0
+    return tans
 
 
 class SplineHermiteCubique(Courbe):
@@ -44,8 +72,6 @@ class SplineHermiteCubique(Courbe):
                             the two points at each end.
         """
         self.curve_type = "Cubic Hermite Spline"
-        # Liste des courbes hermites constituant la spline totale
-        self.courbes = []
         self.params = param_steps
         self.control_points_ = points_to_array(points)
 
@@ -59,38 +85,54 @@ class SplineHermiteCubique(Courbe):
         else:
             self.tangent = "approximated"
 
-        # Estimation des tangeantes (Les extrémités sont approximées par des tangeantes nulles)
-        tans = []
-        if self.tangent == "approximated":
-            tans = [(points[1] - points[0]) / (param_steps[1] - param_steps[0])]
-            for k in range(1, len(points) - 1):
-                tans.append((points[k + 1] - points[k - 1]) * (1 - self.tension ) / (param_steps[k + 1] - param_steps[k - 1]))
-            tans.append((points[-1] - points[-2]) / (param_steps[-1] - param_steps[-2]))
-        else:
-            tans = [Point(0, 0)]
-            for k in range(1, len(points) - 1):
-                tans.append((points[k + 1] - points[k - 1]) * (1 - self.tension ) / (param_steps[k + 1] - param_steps[k - 1]))
-            tans.append(Point(0, 0))
-
+        # Estimation des tangeantes, sous la forme d'un tableau numpy de dimension (2, N)
         # Remembers the tangents for the bending curve
-        self.tans = tans
+        self.tans = estimate_tangents(self.control_points_, param_steps, self.tension, self.tangent)
 
-        for k in range(len(points) - 1):
-            courbe = CourbeHermiteCubique(points[k], points[k + 1], tans[k], tans[k + 1])
-            self.courbes.append(courbe)
+        # Points de Béziers de tous les segments de la spline, de dimension (nb_segments, 2, 4)
+        self.bezier_points = hermite_to_bezier(self.control_points_, self.tans)
 
-    def points(self, res: int):
+        # Derniers points calculés par self.points(): seuls ceux des segments modifiés
+        # depuis sont recalculés (voir SegmentsSamples)
+        self.samples = SegmentsSamples()
+
+    def points(self, res: int = 100, tolerance=None, scale=None):
         """
         Calcule la courbe et renvoie les points calculées sous la forme
         d'une matrice numpy P de dimensions (2, res) où P[:, i] correspond
         au point numéro i.
+        Le tableau renvoyé est en lecture seule. Il n'est pas modifié par la modification
+        suivante de la courbe, mais peut l'être par celle d'après (voir SegmentsSamples).
         :param res  Résolution demandée pour le tracé.
+        :param tolerance    Si précisée, chaque segment est échantillonné de manière adaptative
+                            (et :param res: est ignoré): les points renvoyés forment une ligne
+                            brisée qui s'écarte de la courbe d'au plus :param tolerance:.
+        :param scale        Facteurs d'échelle (sx, sy) des deux axes, en pixels par unité par exemple:
+                            si précisés, :param tolerance: est exprimée dans ces unités (voir ecart_corde).
         """
-        # Chaque courbe HermiteCubique de self.courbes calcule les points
-        # du tracé qu'elle retourne sous la forme d'un tableau numpy de dimensions (2, nb_points).
-        # Il suffit de concaténer tous tableau dans le sens des colonnes (axis 1) pour récupérer
-        # le tableau de dimensions (2, nb_points_total).
-        return np.concatenate([courbe.points(int(res / len(self.courbes))) for courbe in self.courbes], axis=1)
+        if tolerance is not None:
+            return subdivision_adaptative(self.bezier_points, tolerance, scale=scale)
+
+        # Tous les segments sont évalués d'un coup à partir du tableau
+        # de leurs points de Bézier (voir bezier_segments_points).
+        # Si seuls quelques segments ont changé depuis le dernier calcul à la même
+        # résolution, seuls leurs échantillons sont recalculés.
+        return self.samples.update(self.bezier_points, res)
+
+    def iter_points(self, res, chunk_size=2 ** 16):
+        """
+        Calcule la courbe par morceaux de :param chunk_size: points (voir Courbe.iter_points).
+        Les morceaux sont calculés directement à partir des points de Bézier, sans passer
+        par les derniers points calculés par self.points(), qui ne sont pas modifiés.
+        """
+        return iter_bezier_segments_points(self.bezier_points, res, chunk_size)
+
+    def bezier_segments(self):
+        """
+        :return: The Bezier control points of every segment of the spline,
+                 as a numpy array of shape (nb_segments, 2, 4).
+        """
+        return self.bezier_points
 
     def plot_bending(self, res):
         """
@@ -99,32 +141,33 @@ class SplineHermiteCubique(Courbe):
                         points d'interpolation
         :return T, C: temps du tracé, et valeurs de la courbure à ces pas de temps
         """
-        points = list(self.control_points_as_points())
-        temps = np.zeros((len(self.params)-1)*res)
-        courbe = np.zeros((len(points)-1)*res)
-        for i in range(len(self.params)-1):
-            lin_steps = np.linspace(self.params[i], self.params[i+1], res)
-            for j in range(res):
-                temps[i*res + j] = lin_steps[j]
-            for n in range(res):
-                t = n/res
-                courbe[i*res + n] = courbure(points[i], points[i+1], self.tans[i], self.tans[i+1], t)
-        return temps, courbe
+        return courbure_segments(self.bezier_points, self.params, res)
 
     def set_control_point(self, pt_index, value: Point):
         """
         Modifies the value of the (pt_index)th control point.
-        Implies recomputing the whole curve.
+        Only the tangents pt_index-1..pt_index+1 depend on it, so only those
+        and the segments that touch them are recomputed.
         :param pt_index: Index of the control point to modify
                          in self.control_points()
         :param value:    new value for the control point
         """
-        # Get the current control points
-        points = list(self.control_points_as_points())
-        # Replace the value for the aimed control point
-        points[pt_index] = value
-        # Recreate the curve with the new control points
-        self.__init__(points, self.params, tension=self.tension, tangent=self.tangent)
+        self.mark_modified()
+        n = self.control_points_.shape[1]
+        self.control_points_[:, pt_index] = (value.x, value.y)
+
+        # Tangents that depend on the modified point
+        first_tan, last_tan = max(0, pt_index - 1), min(n - 1, pt_index + 1)
+        self.tans[:, first_tan:last_tan + 1] = estimate_tangents(self.control_points_, self.params, self.tension,
+                                                                 self.tangent, first_tan, last_tan)
+
+        # Segments whose ends use one of those tangents
+        first, last = max(0, first_tan - 1), min(n - 2, last_tan)
+        self.bezier_points[first:last + 1] = hermite_to_bezier(self.control_points_[:, first:last + 2],
+                                                               self.tans[:, first:last + 2])
+
+        # Remembers which segments must be resampled
+        self.samples.mark_dirty(first, last)
 
     def hyperparameters_values(self):
         """
@@ -8,16 +8,19 @@ from builtins import map
 
 import numpy as np
 from courbes.courbe import Courbe
-from courbes.hermite_cubique import CourbeHermiteCubique
-from geom_utils.point import Point, points_to_array, from_numpy_array
-from algos.courbure import courbure
+from courbes.hermite_cubique import hermite_to_bezier, iter_bezier_segments_points, SegmentsSamples
+from geom_utils.point import Point, points_to_array
+from algos.casteljau import subdivision_adaptative
+from algos.courbure import courbure_segments
+from algos.thomas import thomas
 
 
 def compute_derivatives(points):
     """
     Computes the values of the derivative at each parameter that allow
     the total spline to be C2.
-    :param points: Interpolation points as a list of Points
+    :param points: Interpolation points as a list of Points, or as a 2D numpy
+                   array of shape (2, number of points).
     :return: A numpy array D where D[i] is the value for the derivative at parameter t_i.
     """
     # The values are solution of a linear system AD = Y
@@ -26,37 +29,40 @@ def compute_derivatives(points):
     #       A = |1 4 1 0 0 |
     #           |0 1 4 1 ..|
     #           |.. ... ...|
+    # A is tridiagonal: only its three diagonals are stored, and the system
+    # is solved in O(N) with the Thomas algorithm.
 
-    # Create the system's matrix A
-    N = len(points) - 2
-    main_diag = np.diag([4] * (N + 2))
-    main_diag[0, 0], main_diag[N + 1, N + 1] = 2, 2
-    lower_diag = np.diag([1] * (N + 1), -1)
-    upper_diag = np.diag([1] * (N + 1), 1)
-    A = lower_diag + main_diag + upper_diag
-
-    # Create Y
     # Converts the Points list into a numpy array
-    interp_points = points_to_array(points)
+    if isinstance(points, np.ndarray):
+        interp_points = points
+    else:
+        interp_points = points_to_array(points)
 
-    # Create Y for the points' first coordinates
-    Y1 = np.empty(N + 2)
-    Y1[1:-1] = 3 * (interp_points[0, 2:] - interp_points[0, :-2])
-    Y1[0] = 3 * (interp_points[0, 1] - interp_points[0, 0])
-    Y1[-1] = 3 * (interp_points[0, -1] - interp_points[0, -2])
+    # Create the system's diagonals
+    N = interp_points.shape[1]
+    main_diag = np.full(N, 4.0)
+    main_diag[0], main_diag[-1] = 2, 2
+    off_diag = np.ones(N - 1)
 
-    # Create Y for the points' second coordinates
-    Y2 = np.empty(N + 2)
-    Y2[1:-1] = 3 * (interp_points[1, 2:] - interp_points[1, :-2])
-    Y2[0] = 3 * (interp_points[1, 1] - interp_points[1, 0])
-    Y2[-1] = 3 * (interp_points[1, -1] - interp_points[1, -2])
+    # Create Y for both coordinates at once, as a (N, 2) array
+    Y = np.empty((N, 2))
+    Y[1:-1] = 3 * (interp_points[:, 2:] - interp_points[:, :-2]).T
+    Y[0] = 3 * (interp_points[:, 1] - interp_points[:, 0])
+    Y[-1] = 3 * (interp_points[:, -1] - interp_points[:, -2])
 
-    # Solve the systems for both coordinates
-    D1 = np.linalg.solve(A, Y1)
-    D2 = np.linalg.solve(A, Y2)
+    # Solve the systems for both coordinates, and return the final values
+    return thomas(off_diag, main_diag, off_diag, Y).T
 
-    # Return the final values
-    return np.vstack((D1, D2))
+
+def influence_radius(tolerance):
+    """
+    The influence of a single right-hand side entry on the solution of the system
+    AD = Y decreases geometrically, by a factor 2 - sqrt(3) per row.
+    :param tolerance: Relative tolerance on the derivatives.
+    :return: The number of rows on each side beyond which the influence
+             falls under the tolerance.
+    """
+    return int(np.ceil(np.log(tolerance) / np.log(2 - np.sqrt(3)))) + 1
 
 
 class SplineC2(Courbe):
@@ -73,36 +79,67 @@ class SplineC2(Courbe):
                             Indique les bornes successives des intervalles correspondant
                             à chaque courbe hermite constituant le spline. Classiquement,
                             correspond à une répartition équidistante.
+        :param tolerance:   Relative tolerance on the derivatives when a single control point
+                            is moved (see set_control_point). Defaults to 1e-10.
         """
         self.curve_type = "C2 Spline"
 
-        # Calcul des dérivées
-        derivs = from_numpy_array(compute_derivatives(points))
-        # Remembers the derivative's values for the bending curve
-        self.tans = derivs
-
-        # Liste des courbes hermites constituant la spline totale
-        self.courbes = []
         self.params = param_steps
         self.control_points_ = points_to_array(points)
 
-        # Création des courbes
-        for k in range(len(points) - 1):
-            courbe = CourbeHermiteCubique(points[k], points[k + 1], derivs[k], derivs[k + 1])
-            self.courbes.append(courbe)
+        if "tolerance" in parameters:
+            self.tolerance = parameters["tolerance"]
+        else:
+            self.tolerance = 1e-10
+
+        # Calcul des dérivées, sous la forme d'un tableau numpy de dimension (2, N)
+        # Remembers the derivative's values for the bending curve
+        self.tans = compute_derivatives(self.control_points_)
+
+        # Points de Béziers de tous les segments de la spline, de dimension (nb_segments, 2, 4)
+        self.bezier_points = hermite_to_bezier(self.control_points_, self.tans)
 
-    def points(self, res: int):
+        # Derniers points calculés par self.points(): seuls ceux des segments modifiés
+        # depuis sont recalculés (voir SegmentsSamples)
+        self.samples = SegmentsSamples()
+
+    def points(self, res: int = 100, tolerance=None, scale=None):
         """
         Calcule la courbe et renvoie les points calculées sous la forme
         d'une matrice numpy P de dimensions (2, res) où P[:, i] correspond
         au point numéro i.
+        Le tableau renvoyé est en lecture seule. Il n'est pas modifié par la modification
+        suivante de la courbe, mais peut l'être par celle d'après (voir SegmentsSamples).
         :param res  Résolution demandée pour le tracé.
+        :param tolerance    Si précisée, chaque segment est échantillonné de manière adaptative
+                            (et :param res: est ignoré): les points renvoyés forment une ligne
+                            brisée qui s'écarte de la courbe d'au plus :param tolerance:.
+        :param scale        Facteurs d'échelle (sx, sy) des deux axes, en pixels par unité par exemple:
+                            si précisés, :param tolerance: est exprimée dans ces unités (voir ecart_corde).
+        """
+        if tolerance is not None:
+            return subdivision_adaptative(self.bezier_points, tolerance, scale=scale)
+
+        # Tous les segments sont évalués d'un coup à partir du tableau
+        # de leurs points de Bézier (voir bezier_segments_points).
+        # Si seuls quelques segments ont changé depuis le dernier calcul à la même
+        # résolution, seuls leurs échantillons sont recalculés.
+        return self.samples.update(self.bezier_points, res)
+
+    def iter_points(self, res, chunk_size=2 ** 16):
+        """
+        Calcule la courbe par morceaux de :param chunk_size: points (voir Courbe.iter_points).
+        Les morceaux sont calculés directement à partir des points de Bézier, sans passer
+        par les derniers points calculés par self.points(), qui ne sont pas modifiés.
         """
-        # Chaque courbe HermiteCubique de self.courbes calcule les points
-        # du tracé qu'elle retourne sous la forme d'un tableau numpy de dimensions (2, nb_points).
-        # Il suffit de concaténer tous tableau dans le sens des colonnes (axis 1) pour récupérer
-        # le tableau de dimensions (2, nb_points_total).
-        return np.concatenate([courbe.points(int(res / len(self.courbes))) for courbe in self.courbes], axis=1)
+        return iter_bezier_segments_points(self.bezier_points, res, chunk_size)
+
+    def bezier_segments(self):
+        """
+        :return: The Bezier control points of every segment of the spline,
+                 as a numpy array of shape (nb_segments, 2, 4).
+        """
+        return self.bezier_points
 
     def plot_bending(self, res):
         """
@@ -111,39 +148,63 @@ class SplineC2(Courbe):
                         points d'interpolation
         :return T, C: temps du tracé, et valeurs de la courbure à ces pas de temps
         """
-        points = list(self.control_points_as_points())
-        temps = np.zeros((len(self.params)-1)*res)
-        courbe = np.zeros((len(points)-1)*res)
-        for i in range(len(self.params)-1):
-            lin_steps = np.linspace(self.params[i], self.params[i+1], res)
-            for j in range(res):
-                temps[i*res + j] = lin_steps[j]
-            for n in range(res):
-                t = n/res
-                courbe[i*res + n] = courbure(points[i], points[i+1], self.tans[i], self.tans[i+1], t)
-        return temps, courbe
+        return courbure_segments(self.bezier_points, self.params, res)
 
     def set_control_point(self, pt_index, value: Point):
         """
         Modifies the value of the (pt_index)th control point.
-        Implies recomputing the whole curve.
+        The derivatives are updated incrementally: moving the point only changes
+        the rows pt_index-1..pt_index+1 of the system's right-hand side, and the
+        change of the solution decreases geometrically away from pt_index. The
+        system is thus only solved for the change, over the rows where it is
+        larger than self.tolerance.
         :param pt_index: Index of the control point to modify
                          in self.control_points()
         :param value:    new value for the control point
         """
-        # Get the current control points
-        points = list(self.control_points_as_points())
-        # Replace the value for the aimed control point
-        points[pt_index] = value
-        # Recreate the curve with the new control points
-        self.__init__(points, self.params)
+        self.mark_modified()
+        n = self.control_points_.shape[1]
+        delta = np.array([value.x, value.y]) - self.control_points_[:, pt_index]
+        self.control_points_[:, pt_index] = (value.x, value.y)
+
+        # Rows of the system where the change of the derivatives is significant
+        radius = influence_radius(self.tolerance)
+        first_tan, last_tan = max(0, pt_index - radius), min(n - 1, pt_index + radius)
+
+        # Change of the right-hand side Y (see compute_derivatives)
+        delta_Y = np.zeros((last_tan - first_tan + 1, 2))
+        if pt_index > 0:
+            delta_Y[pt_index - 1 - first_tan] += 3 * delta
+        if pt_index < n - 1:
+            delta_Y[pt_index + 1 - first_tan] -= 3 * delta
+        if pt_index == 0:
+            delta_Y[0] -= 3 * delta
+        if pt_index == n - 1:
+            delta_Y[-1] += 3 * delta
+
+        # Solves the system restricted to these rows for the change of the derivatives
+        main_diag = np.full(last_tan - first_tan + 1, 4.0)
+        if first_tan == 0:
+            main_diag[0] = 2
+        if last_tan == n - 1:
+            main_diag[-1] = 2
+        off_diag = np.ones(last_tan - first_tan)
+        self.tans[:, first_tan:last_tan + 1] += thomas(off_diag, main_diag, off_diag, delta_Y).T
+
+        # Segments whose ends use one of the updated derivatives
+        first, last = max(0, first_tan - 1), min(n - 2, last_tan)
+        self.bezier_points[first:last + 1] = hermite_to_bezier(self.control_points_[:, first:last + 2],
+                                                               self.tans[:, first:last + 2])
+
+        # Remembers which segments must be resampled
+        self.samples.mark_dirty(first, last)
 
     def hyperparameters_values(self):
         """
         Returns a map of the curve's parameters along with their values.
         :return:
         """
-        return {}
+        return {'tolerance': self.tolerance}
 
     def hyperparameters(self):
         """
@@ -0,0 +1,135 @@
+"""
+Defines the BoundingVolumeHierarchy object, used for nearest object queries.
+"""
+
+import math
+import numpy as np
+
+
+class BoundingVolumeHierarchy:
+    """
+    A BoundingVolumeHierarchy is a binary tree of axis-aligned bounding boxes built over a set
+    of objects, each of them represented by its own bounding box. Each node's box contains the
+    boxes of its children, which allows the search for the object nearest to a position to
+    skip whole subtrees. When an object's box changes, the tree can be refitted (see refit)
+    instead of being rebuilt.
+    """
+
+    def __init__(self, lower, upper, leaf_size=4):
+        """
+        :param lower: Lower corners of the objects' boxes, as a numpy array of shape (number of objects, 2).
+        :param upper: Upper corners of the objects' boxes, as a numpy array of shape (number of objects, 2).
+        :param leaf_size: Maximum number of objects in a leaf of the tree.
+        """
+        self.leaf_size = leaf_size
+        # Objects' boxes, kept for refit
+        self.lower, self.upper = np.array(lower, dtype=float), np.array(upper, dtype=float)
+        # Objects indices, sorted so that each node contains a contiguous range of them
+        self.order = np.arange(lower.shape[0])
+        # Nodes of the tree: box corners, children (-1 for leaves), parent (-1 for the root),
+        # and range of self.order
+        self.nodes_lower, self.nodes_upper = [], []
+        self.children, self.parents, self.ranges = [], [], []
+        if lower.shape[0] > 0:
+            self._build(self.lower, self.upper, 0, lower.shape[0], -1)
+        self.nodes_lower, self.nodes_upper = np.array(self.nodes_lower), np.array(self.nodes_upper)
+        # Leaf containing each object
+        self.leaves = np.empty(lower.shape[0], dtype=int)
+        for node, (left, _) in enumerate(self.children):
+            if left < 0:
+                self.leaves[self.order[slice(*self.ranges[node])]] = node
+        # Nodes boxes as tuples of floats (xmin, ymin, xmax, ymax): the traversal handles
+        # one node at a time, which is much faster on Python floats than on numpy arrays
+        self.boxes = [tuple(box) for box in np.hstack((self.nodes_lower, self.nodes_upper)).reshape(-1, 4).tolist()]
+
+    def _build(self, lower, upper, start, end, parent):
+        """
+        Builds the subtree containing the objects self.order[start:end].
+        :return: The index of the subtree's root.
+        """
+        indices = self.order[start:end]
+        node = len(self.ranges)
+        self.nodes_lower.append(lower[indices].min(axis=0))
+        self.nodes_upper.append(upper[indices].max(axis=0))
+        self.ranges.append((start, end))
+        self.children.append((-1, -1))
+        self.parents.append(parent)
+        if end - start <= self.leaf_size:
+            return node
+
+        # Splits the objects in two halves along the box's largest dimension
+        centers = (lower[indices] + upper[indices]) / 2
+        axis = np.argmax(self.nodes_upper[node] - self.nodes_lower[node])
+        middle = (end - start) // 2
+        self.order[start:end] = indices[np.argpartition(centers[:, axis], middle)]
+        left = self._build(lower, upper, start, start + middle, node)
+        right = self._build(lower, upper, start + middle, end, node)
+        self.children[node] = (left, right)
+        return node
+
+    def refit(self, index, lower, upper):
+        """
+        Replaces the box of an object, and recomputes the boxes of the nodes containing it,
+        from its leaf up to the root. The structure of the tree is kept: the queries stay exact,
+        but they may become slower if the object moved far from its former neighbours.
+        :param index: Index of the object.
+        :param lower, upper: Corners of its new box.
+        """
+        self.lower[index], self.upper[index] = lower, upper
+        node = self.leaves[index]
+        while node >= 0:
+            left, right = self.children[node]
+            if left < 0:
+                indices = self.order[slice(*self.ranges[node])]
+                self.nodes_lower[node] = self.lower[indices].min(axis=0)
+                self.nodes_upper[node] = self.upper[indices].max(axis=0)
+            else:
+                self.nodes_lower[node] = np.minimum(self.nodes_lower[left], self.nodes_lower[right])
+                self.nodes_upper[node] = np.maximum(self.nodes_upper[left], self.nodes_upper[right])
+            self.boxes[node] = tuple(self.nodes_lower[node].tolist() + self.nodes_upper[node].tolist())
+            node = self.parents[node]
+
+    @property
+    def bounds(self):
+        """
+        :return: The lower and upper corners of the box containing all objects.
+        """
+        return self.nodes_lower[0], self.nodes_upper[0]
+
+    def nearest(self, x, y, max_distance, distance_function):
+        """
+        Finds the object nearest to the position (x, y), within a maximum distance.
+        :param distance_function: Function which, given an array of objects indices, returns
+                                  (distances, data): the exact distances from (x, y) to each of
+                                  these objects, and any additional data about them (one item
+                                  per object).
+        :return: (index, distance, data) for the nearest object, or None if no object lies
+                 within max_distance.
+        """
+        if not self.ranges:
+            return None
+        def node_distance(node):
+            xmin, ymin, xmax, ymax = self.boxes[node]
+            return math.hypot(max(xmin - x, x - xmax, 0), max(ymin - y, y - ymax, 0))
+
+        best = None
+        best_distance = max_distance
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if node_distance(node) > best_distance:
+                continue
+            left, right = self.children[node]
+            if left < 0:
+                indices = self.order[slice(*self.ranges[node])]
+                distances, data = distance_function(indices)
+                k = np.argmin(distances)
+                if distances[k] <= best_distance:
+                    best, best_distance = (indices[k], distances[k], data[k]), distances[k]
+            else:
+                # The nearest child is visited first, as it is the most likely to shrink the search
+                if node_distance(left) > node_distance(right):
+                    stack.extend((left, right))
+                else:
+                    stack.extend((right, left))
+        return best
@@ -0,0 +1,65 @@
+"""
+Defines the GridIndex object, a spatial index for nearest point queries.
+"""
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    A GridIndex sorts a set of 2D points into the cells of a uniform grid, so that
+    the points close to a given position can be found without browsing all of them.
+    Points can be moved one by one, which only updates the cells concerned.
+    """
+
+    def __init__(self, points, cell_size):
+        """
+        :param points: The indexed points, as a numpy array of shape (2, number of points).
+        :param cell_size: Side of the grid's cells. Queries are the fastest for a radius
+                          close to the cell size.
+        """
+        self.cell_size = cell_size
+        self.positions = np.array(points, dtype=float)
+        # Map {(i, j): list of the indices of the points inside cell (i, j)}
+        self.cells = dict()
+        cells = np.floor(self.positions / cell_size).astype(int)
+        for index, cell in enumerate(zip(cells[0].tolist(), cells[1].tolist())):
+            self.cells.setdefault(cell, []).append(index)
+
+    def cell(self, x, y):
+        """
+        :return: The coordinates (i, j) of the cell containing the position (x, y).
+        """
+        return int(np.floor(x / self.cell_size)), int(np.floor(y / self.cell_size))
+
+    def nearest(self, x, y, radius):
+        """
+        Finds the nearest point from (x, y) within a given radius.
+        :return: The index of the nearest point, or None if no point lies within the radius.
+        """
+        i0, j0 = self.cell(x, y)
+        reach = int(np.ceil(radius / self.cell_size))
+        candidates = []
+        for i in range(i0 - reach, i0 + reach + 1):
+            for j in range(j0 - reach, j0 + reach + 1):
+                candidates.extend(self.cells.get((i, j), ()))
+        if not candidates:
+            return None
+        distances = np.hypot(self.positions[0, candidates] - x, self.positions[1, candidates] - y)
+        best = np.argmin(distances)
+        if distances[best] > radius:
+            return None
+        return candidates[best]
+
+    def move(self, index, x, y):
+        """
+        Moves a point of the index to the position (x, y).
+        """
+        old_cell = self.cell(*self.positions[:, index])
+        new_cell = self.cell(x, y)
+        self.positions[:, index] = (x, y)
+        if old_cell != new_cell:
+            self.cells[old_cell].remove(index)
+            if not self.cells[old_cell]:
+                del self.cells[old_cell]
+            self.cells.setdefault(new_cell, []).append(index)
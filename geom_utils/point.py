@@ -1,31 +1,20 @@
 """
-Defines the Point object.
+Defines the Point and PointArray objects.
 """
 
 
 import numpy as np
-from itertools import tee
-
-
-def pairs(iterable):
-    """
-    Iterates over the pairs of an iterable.
-    For an iterable (A, B, C, D), returns (A, B); then (C, D)...
-    The iterable must contain an even positive number of elements.
-    """
-    k0 = 0
-    while k0 <= len(iterable) - 2:
-        yield iterable[k0], iterable[k0 + 1]
-        k0 += 2
 
 
 def points_to_array(point_array):
     """
     Converts an array of Points into a 2D numpy array
     of shape (2, number of points).
-    :param point_array: Iterable of Points
+    :param point_array: Iterable of Points, or a PointArray
     :return: a ndarray N such that N[:, i] = points_array[i]
     """
+    if isinstance(point_array, PointArray):
+        return point_array.coords.copy()
     res_array = np.empty((2, len(point_array)))
     for k, point in enumerate(point_array):
         res_array[:, k] = (point.x, point.y)
@@ -34,14 +23,12 @@ def points_to_array(point_array):
 
 def from_numpy_array(np_array):
     """
-    Converts a 2D numpy array N of shape (2, nb_points) into a list
+    Converts a 2D numpy array N of shape (2, nb_points) into a sequence
     of Points
-    :return: A list of Points P so that P[i] == Point(column i)
+    :return: A PointArray P so that P[i] == Point(column i). Its coordinates are a copy
+             of N, so that modifying one does not modify the other.
     """
-    pts_list = []
-    for k in range(np_array.shape[1]):
-        pts_list.append(Point(np_array[0, k], np_array[1, k]))
-    return pts_list
+    return PointArray(np.array(np_array, dtype=float))
 
 
 def from_string(coordinates):
@@ -50,18 +37,16 @@ def from_string(coordinates):
     :param coordinates: String indicating the coordinates.
     Must match the form: x0 y0 x1 y1 ..
     For example, points (0, 3) and (1, 2) are written "0 3 1 2".
-    :return: A list of Points with the corresponding coordinate
+    :return: A PointArray with the corresponding coordinates
     """
-    points = []
     coords_char = coordinates.split()
 
     # Check that an even number of coordinates was received
     if len(coords_char) % 2 != 0:
         raise IndexError("Missing coordinate")
 
-    for x, y in pairs(coords_char):
-        points.append(Point(float(x), float(y)))
-    return points
+    coords = np.array([float(c) for c in coords_char]).reshape(-1, 2).T
+    return PointArray(coords)
 
 
 class Point:
@@ -69,6 +54,7 @@ class Point:
     A point is a couple of real coordinates, which can be added to another point,
     substracted from another point, multiplied by a real value.
     """
+    __slots__ = ("x", "y")
 
     def __init__(self, x, y):
         self.x, self.y = x, y
@@ -111,3 +97,87 @@ class Point:
 
     def __repr__(self):
         return str(self)
+
+
+class PointArray:
+    """
+    A PointArray is a sequence of Points stored as a single numpy array of
+    shape (2, number of points), whose columns are the points.
+    It supports the same operations as Point (addition, substraction, product
+    by a scalar...), computed on all the points at once, as well as slicing.
+    Indexing a single element returns a Point.
+    """
+    __slots__ = ("coords",)
+
+    def __init__(self, coords):
+        """
+        :param coords: Array-like of shape (2, number of points).
+        """
+        self.coords = np.asarray(coords, dtype=float)
+
+    def copy(self):
+        """
+        Returns a deep copy of this array of points
+        """
+        return PointArray(self.coords.copy())
+
+    def __len__(self):
+        return self.coords.shape[1]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return Point(self.coords[0, item], self.coords[1, item])
+        return PointArray(self.coords[:, item])
+
+    def __setitem__(self, item, value):
+        if isinstance(value, Point):
+            self.coords[:, item] = (value.x, value.y)
+        else:
+            self.coords[:, item] = _coords(value)
+
+    def __iter__(self):
+        for k in range(self.coords.shape[1]):
+            yield Point(self.coords[0, k], self.coords[1, k])
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and np.dtype(dtype) != self.coords.dtype:
+            if copy is False:
+                raise ValueError("Unable to avoid a copy while converting the PointArray")
+            return self.coords.astype(dtype)
+        return self.coords.copy() if copy else self.coords
+
+    def __add__(self, other):
+        return PointArray(self.coords + _coords(other))
+
+    def __neg__(self):
+        return PointArray(-self.coords)
+
+    def __sub__(self, other):
+        return PointArray(self.coords - _coords(other))
+
+    def __mul__(self, scalar):
+        return PointArray(self.coords * scalar)
+
+    def times(self, scalar):
+        return PointArray(self.coords * scalar)
+
+    def __truediv__(self, scalar):
+        return PointArray(self.coords / scalar)
+
+    def __str__(self):
+        return "[" + ", ".join(str(pt) for pt in self) + "]"
+
+    def __repr__(self):
+        return str(self)
+
+
+def _coords(other):
+    """
+    Returns the coordinates of a Point or PointArray in a form that can be
+    broadcast against a (2, n) array.
+    """
+    if isinstance(other, PointArray):
+        return other.coords
+    if isinstance(other, Point):
+        return np.array([[other.x], [other.y]])
+    return np.asarray(other)
@@ -0,0 +1,92 @@
+"""
+Implémente le cache des points calculés des courbes, utilisé par le Plotter.
+"""
+
+from collections import OrderedDict
+
+
+class GeometryCache:
+    """
+    Cache LRU des points calculés des courbes.
+    Une entrée est identifiée par (curve_id, version, résolution): une courbe modifiée
+    change de version (voir Courbe.mark_modified), ses anciens points ne peuvent donc
+    jamais être renvoyés. Les entrées les moins récemment utilisées sont retirées dès
+    que la mémoire occupée dépasse le budget.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        """
+        :param max_bytes: Budget mémoire du cache, en octets.
+        """
+        self.max_bytes = max_bytes
+        # OrderedDict {(curve_id, version, res): points}, de la moins à la plus
+        # récemment utilisée
+        self.entries = OrderedDict()
+        # Clés des entrées de chaque courbe {curve_id: set of keys}, afin de retirer
+        # les entrées d'une courbe sans parcourir tout le cache
+        self.curves_keys = dict()
+        self.nbytes = 0
+        self.hits, self.misses = 0, 0
+
+    def get(self, curve_id, version, res):
+        """
+        :return: Les points de la courbe en cache pour cette version et cette résolution,
+                 ou None s'ils n'y sont pas.
+        """
+        key = (curve_id, version, res)
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, curve_id, version, res, points):
+        """
+        Ajoute les points d'une courbe au cache. Les entrées des versions
+        précédentes de la courbe sont retirées.
+        """
+        for key in [key for key in self.curves_keys.get(curve_id, ()) if key[1] != version]:
+            self._pop(key)
+        key = (curve_id, version, res)
+        if key in self.entries:
+            self._pop(key)
+        self.entries[key] = points
+        self.curves_keys.setdefault(curve_id, set()).add(key)
+        self.nbytes += points.nbytes
+
+        # Eviction des entrées les moins récemment utilisées (sauf celle ajoutée)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            self._pop(next(iter(self.entries)))
+
+    def remove(self, curve_id):
+        """
+        Retire du cache toutes les entrées d'une courbe, s'il y en a.
+        """
+        for key in list(self.curves_keys.get(curve_id, ())):
+            self._pop(key)
+
+    def clear(self):
+        """
+        Vide le cache.
+        """
+        self.entries.clear()
+        self.curves_keys.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        """
+        :return: A map of the cache statistics: hits, misses, number of entries and bytes used.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self.entries), 'bytes': self.nbytes}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _pop(self, key):
+        self.nbytes -= self.entries.pop(key).nbytes
+        curve_keys = self.curves_keys[key[0]]
+        curve_keys.discard(key)
+        if not curve_keys:
+            del self.curves_keys[key[0]]
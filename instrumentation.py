@@ -0,0 +1,218 @@
+"""
+Mesure optionnelle de la durée des étapes d'une interaction (calcul des courbes, cache,
+artistes matplotlib, dessin de la figure).
+
+L'instrumentation est désactivée par défaut, et ne coûte alors qu'un test par étape:
+    from instrumentation import tracer
+    tracer.enable()
+    ...
+    tracer.print_summary()
+    tracer.export_chrome_trace("trace.json")   # à ouvrir dans chrome://tracing ou Perfetto
+"""
+
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+
+class Stage:
+    """
+    Context manager measuring the duration of a stage (see Tracer.stage).
+    """
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer, self.name, self.args = tracer, name, args
+
+    def __enter__(self):
+        stack = self.tracer.stacks()
+        # Les informations non précisées (id de la courbe...) sont reprises de l'étape englobante
+        if stack:
+            args = dict(stack[-1])
+            args.update((key, value) for key, value in self.args.items() if value is not None)
+            self.args = args
+        stack.append(self.args)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        self.tracer.stacks().pop()
+        self.tracer.record(self.name, self.start, duration, self.args)
+        return False
+
+
+class NullStage:
+    """
+    Context manager doing nothing, used when the instrumentation is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+class Tracer:
+    """
+    Enregistre la durée des étapes, avec l'id de la courbe, son type et la résolution concernés.
+    Les derniers enregistrements sont conservés pour l'export au format Chrome trace-event,
+    et les dernières durées de chaque étape pour un résumé glissant.
+    """
+
+    def __init__(self, max_records=100000, window=200):
+        """
+        :param max_records: Nombre maximal d'enregistrements conservés pour l'export.
+        :param window:      Nombre des dernières durées de chaque étape prises en compte par le résumé.
+        """
+        self.enabled = False
+        self.records = deque(maxlen=max_records)
+        self.window = window
+        self.durations = dict()
+        # Intervalle entre deux affichages automatiques du résumé, en secondes (None: jamais)
+        self.summary_interval = None
+        self.last_summary = 0
+        self.origin = time.perf_counter()
+        self.local = threading.local()
+
+    def enable(self, summary_interval=None):
+        """
+        Starts recording.
+        :param summary_interval: If given, the summary is printed every summary_interval seconds
+                                 (at most), when a stage ends.
+        """
+        self.enabled = True
+        self.summary_interval = summary_interval
+        self.last_summary = time.perf_counter()
+
+    def disable(self):
+        """
+        Stops recording. The records are kept.
+        """
+        self.enabled = False
+
+    def clear(self):
+        """
+        Removes all the records.
+        """
+        self.records.clear()
+        self.durations.clear()
+        self.origin = time.perf_counter()
+
+    def stacks(self):
+        """
+        :return: The stack of the stages currently measured in the calling thread.
+        """
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def stage(self, name, curve_id=None, curve_type=None, resolution=None):
+        """
+        :return: A context manager measuring the duration of its block as the stage :param name:.
+                 The information that isn't given is taken from the enclosing stage, if any.
+        """
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name, {'curve_id': curve_id, 'curve_type': curve_type, 'resolution': resolution})
+
+    def record(self, name, start, duration, args):
+        """
+        Adds a record, and prints the summary if it's time to.
+        """
+        self.records.append((name, start, duration, threading.get_ident(), args))
+        if name not in self.durations:
+            self.durations[name] = deque(maxlen=self.window)
+        self.durations[name].append(duration)
+
+        if self.summary_interval is not None and start - self.last_summary > self.summary_interval:
+            self.last_summary = start
+            self.print_summary()
+
+    def summary(self):
+        """
+        :return: A map {stage: {'count', 'mean', 'max', 'total'}} of the durations of the last
+                 records of each stage, in seconds ('count' is the number of these records).
+        """
+        summary = dict()
+        for name, durations in list(self.durations.items()):
+            durations = list(durations)
+            summary[name] = {'count': len(durations), 'mean': sum(durations) / len(durations),
+                             'max': max(durations), 'total': sum(durations)}
+        return summary
+
+    def print_summary(self):
+        """
+        Prints the summary (see summary), the slowest stages first.
+        """
+        summary = self.summary()
+        print("{:<30} {:>6} {:>10} {:>10} {:>10}".format("stage", "count", "mean ms", "max ms", "total ms"))
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]['total']):
+            print("{:<30} {:>6} {:>10.3f} {:>10.3f} {:>10.3f}".format(name, stats['count'], stats['mean'] * 1000,
+                                                                     stats['max'] * 1000, stats['total'] * 1000))
+
+    def chrome_trace(self):
+        """
+        :return: The records as a Chrome trace-event map (complete events, timestamps in microseconds).
+        """
+        pid = os.getpid()
+        events = []
+        for name, start, duration, thread, args in list(self.records):
+            events.append({'name': name, 'cat': name.split(".")[0], 'ph': 'X', 'pid': pid, 'tid': thread,
+                           'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6,
+                           'args': {key: value for key, value in args.items() if value is not None}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """
+        Writes the records to a Chrome trace-event JSON file, which can be opened
+        in chrome://tracing or Perfetto.
+        """
+        with open(path, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file, default=str)
+
+
+"""
+Tracer used by the whole application
+"""
+tracer = Tracer()
+
+
+def traced(method, name):
+    """
+    Instruments a curve method whose first argument is the resolution, such as Courbe.points:
+    each call is measured as the stage :param name:, along with the curve's type and the resolution.
+    """
+    @functools.wraps(method)
+    def traced_method(curve, *args, **kwargs):
+        if not tracer.enabled:
+            return method(curve, *args, **kwargs)
+        resolution = args[0] if args else kwargs.get("res")
+        with tracer.stage(name, curve_type=curve.get_type(), resolution=resolution):
+            return method(curve, *args, **kwargs)
+    return traced_method
+
+
+def instrument_curves(base):
+    """
+    Instruments the points and plot_bending methods of every type of curve (see traced):
+    those of the subclasses of :param base: already defined, and those defined later.
+    The curves themselves don't depend on this module: the application calls this function.
+    :param base: The base class of the curves, courbes.courbe.Courbe.
+    """
+    if base.method_wrapper is not None:
+        return
+    base.method_wrapper = traced
+    classes = list(base.__subclasses__())
+    while classes:
+        cls = classes.pop()
+        base.wrap_methods(cls)
+        classes.extend(cls.__subclasses__())
@@ -4,20 +4,19 @@ Object containing the application's GUI Interface.
 import numpy as np
 from tkinter import *
 from tkinter.messagebox import showerror
+from tkinter.filedialog import askdirectory
 from tkinter.ttk import Combobox
 from plotter import Plotter
-from courbes.spline_hermite_cubique import SplineHermiteCubique
-from courbes.splines_c2 import SplineC2
-from courbes.lagrange import CourbeLagrange
+from instrumentation import tracer
+from courbes.catalogue import curves_constructors
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from geom_utils.point import from_numpy_array, from_string
 
 """
-Constructors for types of curves that can be created by the user
+Minimum delay between two renders of the figure, in milliseconds (about one display frame).
+Events received in between are coalesced: only the latest state is rendered.
 """
-curves_constructors = {'Cubic Hermite Spline': SplineHermiteCubique,
-                       'Lagrange Interpolation': CourbeLagrange,
-                       'C2 Spline': SplineC2}
+FRAME_DELAY = 16
 
 
 def empty_widget(widget):
@@ -49,7 +48,9 @@ class Interface(Frame):
 
         # MATPLOTLIB INTEGRATION ------------------------------------------
 
-        self.plotter = Plotter()
+        # The curves are sampled for the current view (level of detail), and the
+        # expensive evaluations run in the background
+        self.plotter = Plotter(level_of_detail=True, background=True)
         # Integrates the plt figure into a canvas object
         canvas = FigureCanvasTkAgg(self.plotter.fig, master=self)
         canvas.draw()
@@ -59,7 +60,24 @@ class Interface(Frame):
         self.fig_canvas = canvas
 
         # Connections for drag & drop events
-        self.fig_canvas.mpl_connect("pick_event", self.canvas_on_pick_event)
+        self.fig_canvas.mpl_connect("button_press_event", self.canvas_on_press_event)
+        # A redraw may start background evaluations (for example, those of a new view in level of detail mode)
+        self.fig_canvas.mpl_connect("draw_event", lambda event: self.schedule_poll())
+        # Connection ids of the motion and release events, only connected during a drag & drop
+        self.drag_cids = []
+
+        # RENDER SCHEDULING -----------------------------------------------
+        # Drag and parameter events only record the latest state, which is then
+        # rendered at most once per frame by self.render_frame().
+        # Latest drag event not rendered yet
+        self.pending_drag = None
+        # Parameters values not applied yet, as a map {parameter_name: value}
+        self.pending_parameters = dict()
+        # Id of the scheduled call to self.render_frame(), if any
+        self.render_job = None
+        # Expensive evaluations run in the plotter's background worker: their results
+        # are collected once per frame by self.poll_background(), whose scheduled call id is kept
+        self.poll_job = None
 
         # WIDGETS ---------------------------------------------------------
         # Widgets are of two types:
@@ -81,6 +99,10 @@ class Interface(Frame):
         buttonCurveAddition.pack(side=TOP)
         self.buttonCurveAddition = buttonCurveAddition
 
+        # Scene saving and loading buttons
+        Button(permanent_menu, text="Save scene", command=self.save_scene_callback).pack(side=TOP, pady=5)
+        Button(permanent_menu, text="Load scene", command=self.load_scene_callback).pack(side=TOP, pady=5)
+
         # CURVES LIST ---
         # Frame containing the curves list
         curves_list_frame = Frame(self, borderwidth=2, relief=GROOVE)
@@ -204,7 +226,7 @@ class Interface(Frame):
                                orient=HORIZONTAL, resolution=(limit_sup - limit_inf) / nb_values,
                                command=lambda x: self.set_parameter_callback(scaler.param_name, scaler.get()), label=param_name)
                 # Set the value of the widegt to the current value of the parameter
-                scaler.set(self.plotter.selected_curve.hyperparameters_values()[param_name])
+                scaler.set(self.plotter.get_curve_parameters_values()[param_name])
 
                 # Remembers the parameter's name to use it inside the callback function
                 scaler.param_name = param_name
@@ -220,7 +242,7 @@ class Interface(Frame):
                 selection_box.param_name = param_name
 
                 # Set the value of the widegt to the current value of the parameter
-                selection_box.set(self.plotter.selected_curve.hyperparameters_values()[param_name])
+                selection_box.set(self.plotter.get_curve_parameters_values()[param_name])
             rely += 0.2
 
         # Curve suppression button
@@ -244,22 +266,83 @@ class Interface(Frame):
     def set_parameter_callback(self, param_name, param_value):
         """
         Callback called when the user modifies a parameter in the curve
-        parameter menu. Sets the value into the curve, recomputes the curve,
-        and refresh the plt figure.
+        parameter menu. The value is set into the curve, and the figure refreshed,
+        at the next frame (see render_frame).
+        """
+        self.pending_parameters[param_name] = param_value
+        self.schedule_render()
+
+    # RENDER SCHEDULING ---------------------------------------------------------------------------------
+
+    def schedule_render(self):
+        """
+        Schedules a call to render_frame at the next frame, unless one is already scheduled.
         """
-        # Sets it into the selected curve
-        self.plotter.set_curve_parameter(param_name, param_value)
+        if self.render_job is None:
+            self.render_job = self.after(FRAME_DELAY, self.render_frame)
 
-        # Refresh the figure canvas
-        self.fig_canvas.draw()
+    def render_frame(self):
+        """
+        Applies the latest pending parameter values and control point position,
+        dropping the intermediate ones, then refreshes the figure once.
+        """
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+
+        if self.pending_parameters:
+            pending_parameters, self.pending_parameters = self.pending_parameters, dict()
+            for param_name, param_value in pending_parameters.items():
+                # Sets it into the selected curve
+                self.plotter.set_curve_parameter(param_name, param_value)
+            # Refresh the figure canvas
+            self.draw_figure()
+            self.schedule_poll()
+
+        if self.pending_drag is not None:
+            event, self.pending_drag = self.pending_drag, None
+            self.plotter.drag_event(event)
+            self.plotter.blit()
+            self.schedule_poll()
+
+    def draw_figure(self):
+        """
+        Redraws the whole figure canvas.
+        """
+        with tracer.stage("Interface.draw", self.plotter.selected_curve_id):
+            self.fig_canvas.draw()
+
+    def schedule_poll(self):
+        """
+        Schedules a call to poll_background at the next frame if the plotter has
+        evaluations running in the background, unless one is already scheduled.
+        """
+        if self.poll_job is None and self.plotter.has_pending_jobs():
+            self.poll_job = self.after(FRAME_DELAY, self.poll_background)
+
+    def poll_background(self):
+        """
+        Displays the results of the plotter's background evaluations finished since the last frame.
+        """
+        self.poll_job = None
+        if self.plotter.collect_results():
+            if self.drag_cids:
+                # During a drag & drop, only the selected curve is redrawn
+                self.plotter.blit()
+            else:
+                self.draw_figure()
+        self.schedule_poll()
 
     def remove_curve_callback(self):
         """
         Callback called when the user presses the "Remove Curve" button.
         Suppresses the currently selected curve.
         """
+        # Pending changes target the curve about to be removed
+        self.render_frame()
         self.plotter.remove_selected_curve()
-        self.fig_canvas.draw()
+        self.draw_figure()
+        self.schedule_poll()
         self.refreshCurvesList()
 
     def show_bending_callback(self):
@@ -268,14 +351,50 @@ class Interface(Frame):
         of the curves.
         """
         self.plotter.plot_bending()
-        self.fig_canvas.draw()
+        self.draw_figure()
+        self.schedule_poll()
 
     def show_curves_callback(self):
         """
         Shows the curves on the matplotlib canvas.
         """
         self.plotter.update()
-        self.fig_canvas.draw()
+        self.draw_figure()
+        self.schedule_poll()
+
+    # SCENES ------------------------------------------------------------------------------------------
+
+    def save_scene_callback(self):
+        """
+        Callback called when the user presses the "Save scene" button.
+        Saves all the curves into a scene directory chosen by the user.
+        """
+        path = askdirectory(title="Save scene", mustexist=False)
+        if not path:
+            return
+        self.render_frame()
+        try:
+            self.plotter.save_scene(path)
+        except (OSError, ValueError) as error:
+            showerror("Scene saving error", str(error))
+
+    def load_scene_callback(self):
+        """
+        Callback called when the user presses the "Load scene" button.
+        Adds the curves of a scene directory chosen by the user.
+        """
+        path = askdirectory(title="Load scene", mustexist=True)
+        if not path:
+            return
+        self.render_frame()
+        try:
+            self.plotter.load_scene(path)
+        except (OSError, ValueError, KeyError) as error:
+            showerror("Scene loading error", str(error))
+            return
+        self.draw_figure()
+        self.schedule_poll()
+        self.refreshCurvesList()
 
     # CURVE CREATION ----------------------------------------------------------------------------------
 
@@ -328,7 +447,8 @@ class Interface(Frame):
         self.plotter.add_curve(curve)
 
         # Refresh the figure and the curves list
-        self.fig_canvas.draw()
+        self.draw_figure()
+        self.schedule_poll()
         self.showCurvesList()
 
     # FIGURE EVENTS -----------------------------------------------------------------------------------
@@ -344,35 +464,63 @@ class Interface(Frame):
 
         # Gets the curve id from the text of the list option that was clicked
         curve_id = listbox.get(int(listbox.curselection()[0]))
+        self.select_curve(curve_id)
+
+    def select_curve(self, curve_id):
+        """
+        Selects a curve given its id, in the plotter and in the curves list.
+        """
+        # Pending changes target the previously selected curve
+        self.render_frame()
         self.plotter.select_curve(curve_id)
 
+        # Highlights the curve in the curves list
+        index = list(self.plotter.courbes().keys()).index(curve_id)
+        self.curves_list.selection_clear(0, END)
+        self.curves_list.selection_set(index)
+
         # Show the curve menu
         self.showCurveParameters()
 
         # Refreshes the figure
-        self.fig_canvas.draw()
+        self.draw_figure()
+        self.schedule_poll()
 
-    def canvas_on_pick_event(self, event):
+    def canvas_on_press_event(self, event):
         """
-        Callback called when the user picks an artist on the plt figure.
+        Callback called when the user clicks on the plt figure.
+        Starts a drag & drop if a control point was picked, otherwise
+        selects the curve under the cursor if there is one.
         """
-        self.plotter.on_pick_event(event)
-        self.fig_canvas.draw()
-        self.fig_canvas.mpl_connect("motion_notify_event", self.canvas_drag_event)
-        self.fig_canvas.mpl_connect("button_release_event", self.canvas_release_event)
+        if not self.plotter.on_press_event(event):
+            found = self.plotter.curve_at_event(event)
+            if found is not None:
+                self.select_curve(found[0])
+            return
+        # Saves the background once, the dragged curve is then blitted over it
+        self.plotter.start_blit()
+        if not self.drag_cids:
+            self.drag_cids = [self.fig_canvas.mpl_connect("motion_notify_event", self.canvas_drag_event),
+                              self.fig_canvas.mpl_connect("button_release_event", self.canvas_release_event)]
 
     def canvas_drag_event(self, event):
         """
         Callback called when the user drags a picked artist on the plt figure.
+        Only the latest position is kept, and rendered at the next frame.
         """
-        self.plotter.drag_event(event)
-        self.fig_canvas.draw()
+        self.pending_drag = event
+        self.schedule_render()
 
     def canvas_release_event(self, event):
         """
         Callback called when the user releases the mouse button on the plt canvas.
         """
+        # Renders the last position before releasing the control point
+        self.render_frame()
         self.plotter.on_release_event(event)
-        self.fig_canvas.mpl_disconnect("motion_notify_event")
-        self.fig_canvas.mpl_disconnect("button_release_event")
-        self.fig_canvas.draw()
+        self.plotter.stop_blit()
+        for cid in self.drag_cids:
+            self.fig_canvas.mpl_disconnect(cid)
+        self.drag_cids = []
+        self.draw_figure()
+        self.schedule_poll()
@@ -2,11 +2,70 @@
 Implémente la classe Plotter permettant la gestion des courbes affichées.
 """
 
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+import os
+import time
+import threading
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from courbes.courbe import Courbe
 from geom_utils.point import Point
-from courbes.kappa import CourbeKappa
+from geometry_cache import GeometryCache
+from geom_utils.grid_index import GridIndex
+from geom_utils.bvh import BoundingVolumeHierarchy
+from algos.casteljau import projection_bezier, subdivision_adaptative
+from scene import save_scene, load_scene
+from courbes.catalogue import curve_type_name, evaluate_curve, build_curve
+from instrumentation import tracer, instrument_curves
+
+
+def evaluate_job(type_name, control_points, params, hyperparameters, evaluate, res, cancelled, curve_id=None):
+    """
+    Builds a copy of a curve from plain arrays (see courbes.catalogue.build_curve) and evaluates it,
+    in the plotter's background worker. Building the copy there also keeps the curve's full rebuild
+    (for example the solve of a C2 spline, when its hyperparameters change) out of the interface's thread.
+    :param evaluate:    Function evaluate(curve, cancelled) returning the points or the bending of the
+                        curve, or None if the job was cancelled during the evaluation.
+    :param res:         Resolution of the evaluation, for the instrumentation only.
+    :param cancelled:   threading.Event set when the job is superseded by a newer one.
+    :param curve_id:    Id of the curve in the plotter, for the instrumentation only.
+    :return: (curve, result, build duration, evaluation duration), durations in seconds,
+             or None if the job was cancelled.
+    """
+    with tracer.stage("Plotter.background_job", curve_id, type_name, res):
+        if cancelled.is_set():
+            return None
+        start = time.perf_counter()
+        curve = build_curve(type_name, control_points, params, hyperparameters)
+        built = time.perf_counter()
+        result = evaluate(curve, cancelled)
+        if result is None:
+            return None
+    return curve, result, built - start, time.perf_counter() - built
+
+
+def chunked_points(res, curve, cancelled):
+    """
+    Computes the points of a curve by chunks (see Courbe.iter_points), and stops as soon as
+    the job is cancelled.
+    :return: The points, or None if the job was cancelled.
+    """
+    chunks = []
+    for chunk in curve.iter_points(res, 2 ** 14):
+        if cancelled.is_set():
+            return None
+        chunks.append(chunk)
+    return np.concatenate(chunks, axis=1)
+
+
+# Mesure de la durée de calcul des courbes, lorsque l'instrumentation est activée
+instrument_curves(Courbe)
+
+
+"""
+Attributes of the Plotter created along with its figure (see Plotter.create_figure)
+"""
+FIGURE_ATTRIBUTES = ("fig", "axs", "ctrl_points_line", "picked_point_line", "bending_line")
 
 
 class Plotter:
@@ -17,61 +76,617 @@ class Plotter:
     Une courbe paramétrique est représentée par un objet du type Courbe.
     """
 
-    def __init__(self):
+    def __init__(self, cache_size=256 * 2 ** 20, level_of_detail=False, pool=None, workers=None,
+                 background=False):
+        """
+        :param cache_size: Budget mémoire du cache des points des courbes, en octets.
+        :param level_of_detail: Si vrai, les points calculés sur chaque segment dépendent
+                                de sa taille à l'écran, et les segments hors de la vue ne
+                                sont pas calculés (voir lod_points).
+        :param pool:    Si "thread" ou "process", les courbes à recalculer lors d'un update
+                        sont évaluées en parallèle par un pool de threads ou de processus
+                        (voir evaluate_curves). Par défaut, elles sont évaluées une à une.
+        :param workers: Nombre de threads ou de processus du pool (par défaut, le nombre de coeurs).
+        :param background:  Si vrai, les calculs coûteux (points des courbes, courbure, et reconstruction
+                            des courbes dont les hyperparamètres changent) sont faits par un thread en
+                            arrière-plan: en attendant leurs résultats, le dernier tracé valide ou un
+                            aperçu en basse résolution est affiché (voir curve_points et collect_results).
+        """
         # Dictionnaire (id_courbe, courbe). L'ID d'une courbe est un string concaténation du
-        # type de courbe et de son numéro dans le dictionnaire
+        # type de courbe et de son numéro d'ajout au plotter
         self.courbes_ = dict()
+        # Nombre de courbes ajoutées depuis la création du plotter. Les numéros ne sont jamais
+        # réutilisés, afin qu'une nouvelle courbe ne puisse pas prendre l'ID (et donc les
+        # entrées du cache) d'une courbe retirée.
+        self.nb_added_curves = 0
 
         # Mémoire cache permettant de ne pas recalculer les courbes inchangées à chaque update.
-        # self.cache[curve_id] contient le tableau numpy correspondant aux points de la courbe
-        self.cache = dict()
-        self.fig, self.axs = plt.subplots()
+        # Les points d'une courbe y sont rangés selon son id, sa version et la résolution
+        # du tracé: une courbe modifiée n'y est donc jamais retrouvée (voir GeometryCache).
+        self.cache = GeometryCache(cache_size)
+        # La figure (self.fig, self.axs) et ses artistes ne sont créés que lors de leur
+        # premier accès (voir create_figure)
+
+        # Pool d'évaluation des courbes, créé lors de sa première utilisation
+        if pool not in (None, "thread", "process"):
+            raise ValueError("Unknown pool type: {}".format(pool))
+        self.pool, self.workers = pool, workers
+        self.executor = None
+
+        # Evaluation en arrière-plan, par un unique thread créé lors de sa première utilisation.
+        # self.jobs[clé] = ((version, résolution, hyperparamètres), future, événement d'annulation, type)
+        # est la tâche en cours pour une clé, qui est l'id d'une courbe ou ("bending", id) pour sa
+        # courbure, et dont le type est celui du calcul (voir evaluation_kind).
+        # Les derniers résultats valides de chaque clé, affichés en attendant les nouveaux, sont gardés
+        # dans le cache (voir remember_result).
+        self.background_evaluation = background
+        self.background_executor = None
+        self.jobs = dict()
+        # Hyperparamètres des courbes en cours de reconstruction en arrière-plan {curve_id: valeurs}
+        # (voir set_curve_parameter)
+        self.pending_parameters = dict()
+        # Durée estimée de chaque type de calcul de chaque clé, par unité de travail (voir
+        # evaluation_work): self.evaluation_costs[(type, clé)], où le type est "incremental" pour les
+        # Drag & Drop, qui ne recalculent que les segments modifiés, "full" pour un calcul complet des
+        # points d'une courbe, et "rebuild" pour la reconstruction d'une courbe dont les hyperparamètres
+        # ont changé. La durée d'une clé encore jamais mesurée est estimée à self.default_cost par unité.
+        # Au-delà de self.frame_budget secondes, un calcul est fait en arrière-plan.
+        self.evaluation_costs = dict()
+        self.default_cost = 1e-9
+        self.frame_budget = 0.01
+        # Nombre de points par point de contrôle des aperçus
+        self.preview_samples = 4
 
         # Résolution par défault de tracé
         self.res = 100
 
+        # Niveau de détail: écart maximal entre un tracé et la courbe (segments de Bézier) ou
+        # entre deux points successifs d'un tracé (autres courbes), en pixels, et nombre maximal
+        # de points par segment
+        self.level_of_detail = level_of_detail
+        self.pixels_per_sample = 2
+        self.lod_tolerance = 0.25
+        self.max_samples_per_segment = 1000
+        # Boîtes englobantes des tracés des courbes qui ne sont pas formées de segments de Bézier,
+        # utilisées pour ne pas les calculer lorsqu'elles sont hors de la vue (voir lod_points):
+        # self.curves_bounds[curve_id] = (version, coin inférieur, coin supérieur)
+        self.curves_bounds = dict()
+
         # Courbe sélectionnée
         self.selected_curve, self.selected_curve_id = None, None
 
         # Référence vers le point de contrôle sélectionné lors d'un Drag & Drop
         self.picked_ctrl_point = None
 
+        # Vrai lorsque la courbure de la courbe sélectionnée est affichée à la place des
+        # courbes (voir plot_bending): les courbes et leurs points de contrôle ne peuvent
+        # alors pas être sélectionnés
+        self.bending_mode = False
+
+        # Rayon de picking des points de contrôle, en pixels
+        self.pick_radius = 5
+        # Index spatial des points de contrôle de la courbe sélectionnée, en coordonnées
+        # d'affichage (pixels), et état de la courbe et de la vue pour lequel il a été construit
+        self.ctrl_index, self.ctrl_index_key = None, None
+
+        # Artistes matplotlib persistants: ils sont créés une seule fois, puis
+        # mis à jour avec set_data() au lieu d'effacer et de redessiner les axes.
+        # self.curves_lines[curve_id] est la Line2D qui trace la courbe
+        self.curves_lines = dict()
+        # Les autres artistes persistants sont créés avec la figure (voir create_figure)
+
+        # Hiérarchies de boîtes englobantes utilisées pour trouver la courbe la plus proche
+        # d'un point (voir curve_at): self.curves_hierarchies[curve_id] = (version, segments, hiérarchie),
+        # et hiérarchie des boîtes de toutes les courbes, avec les ids et les versions des courbes
+        # dont elle contient les boîtes
+        self.curves_hierarchies = dict()
+        self.scene_hierarchy, self.scene_curves, self.scene_versions = None, [], []
+
+        # Fond de la figure sauvegardé lors d'un Drag & Drop, sur lequel seuls
+        # la courbe sélectionnée et ses points de contrôle sont redessinés (blitting)
+        self.background = None
+
+    def __getattr__(self, name):
+        """
+        Creates the figure when one of its attributes is accessed for the first time.
+        """
+        if name in FIGURE_ATTRIBUTES and "fig" not in self.__dict__:
+            self.create_figure()
+            return getattr(self, name)
+        raise AttributeError("'Plotter' object has no attribute '{}'".format(name))
+
+    def create_figure(self):
+        """
+        Creates the figure, its axes and the plotter's persistent artists.
+        The figure is drawn by an Agg canvas, which the interface replaces by its own.
+        """
+        # Imports locaux: matplotlib n'est chargé que si une figure est nécessaire
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.fig = Figure()
+        FigureCanvasAgg(self.fig)
+        self.axs = self.fig.add_subplot()
+
         # Rayon maximum pour le picking d'un objet
         self.axs.get_xaxis().set_pickradius(0.01)
         self.axs.get_yaxis().set_pickradius(0.01)
 
+        # Line2D unique contenant tous les points de contrôle de la courbe sélectionnée,
+        # et Line2D du point de contrôle en cours de déplacement
+        self.ctrl_points_line, = self.axs.plot([], [], "ro", zorder=3)
+        self.picked_point_line, = self.axs.plot([], [], "bo", zorder=3)
+        # Line2D utilisée pour tracer la courbure
+        self.bending_line, = self.axs.plot([], [], color="C0")
+        self.bending_line.set_visible(False)
+
+        # En mode niveau de détail, les tracés sont recalculés à chaque changement de la vue.
+        # Les callbacks du canvas sont ceux de la figure: ils sont conservés par le canvas
+        # de l'interface qui remplace celui-ci.
+        self.axs.callbacks.connect("xlim_changed", self.refresh_level_of_detail)
+        self.axs.callbacks.connect("ylim_changed", self.refresh_level_of_detail)
+        self.fig.canvas.mpl_connect("resize_event", self.refresh_level_of_detail)
+
     def update(self):
         """
         Met à jour l'affichage des courbes, et des points de contrôle.
         """
-        self.axs.clear()
+        self.bending_mode = False
+        self.bending_line.set_visible(False)
+
+        # En mode niveau de détail, les tracés dépendent de la vue: celle-ci est donc
+        # fixée avant de les calculer (à partir des points de contrôle des courbes, sauf
+        # si l'utilisateur a lui-même choisi la vue).
+        if self.level_of_detail and self.axs.get_autoscale_on():
+            # Les tracés sont calculés ci-dessous pour la vue finale, et non à chaque limite modifiée
+            with self.axs.callbacks.blocked():
+                self.axs.relim(visible_only=True)
+                for curve in self.courbes_.values():
+                    self.axs.update_datalim(curve.control_points().T)
+                self.axs.autoscale_view()
 
-        # Dessin des courbes
+        # Dessin des courbes, après avoir calculé d'un coup celles qui ne sont pas dans le cache
+        if self.pool is not None and not self.level_of_detail and not self.background_evaluation:
+            self.evaluate_curves([curve_id for curve_id in self.courbes_.keys()
+                                  if (curve_id, self.courbes_[curve_id].version,
+                                      self.curve_resolution(curve_id)) not in self.cache])
         for curve_id in self.courbes_.keys():
-            # Si les points de la courbe sont déjà dans le cache, on
-            # les affichent
-            if curve_id in self.cache:
-                points = self.cache[curve_id]
-                self.axs.plot(points[0, :], points[1, :])
-            else:
-                # Si les points ne sont pas dans le cache, il faut les
-                # recalculer.
-                resolution = len(list(self.selected_curve.control_points_as_points())) * 30
-                points = self.courbes_[curve_id].points(resolution)
-                self.cache[curve_id] = points
-                self.axs.plot(points[0, :], points[1, :])
+            points = self.curve_points(curve_id)
+            with tracer.stage("Plotter.update_artist", curve_id, resolution=points.shape[1]):
+                if curve_id in self.curves_lines:
+                    self.curves_lines[curve_id].set_data(points[0, :], points[1, :])
+                    self.curves_lines[curve_id].set_visible(True)
+                else:
+                    self.curves_lines[curve_id], = self.axs.plot(points[0, :], points[1, :])
 
         # Dessin des points de contrôle de la courbe sélectionnée
-        if self.selected_curve is not None:
-            for index, pt in enumerate(self.selected_curve.control_points_as_points()):
-                style = "ro"
-                if self.picked_ctrl_point is not None and index == self.picked_ctrl_point:
-                    style = "bo"
-                # Dessine le point de contrôle en question, et récupère l'objet Line2D associé
-                drawn_point, = self.axs.plot([pt[0]], [pt[1]], style)
-                # Permet la possibilité de pick le point en cliquant dans un rayon de 5 pixels autour
-                drawn_point.set_picker(True)
-                drawn_point.set_pickradius(5)
+        self.update_control_points()
+
+        if not self.level_of_detail:
+            self.axs.relim(visible_only=True)
+            self.axs.autoscale_view()
+
+    def curve_resolution(self, curve_id):
+        """
+        :return: The resolution at which a curve is plotted.
+        """
+        return self.courbes_[curve_id].control_points().shape[1] * 30
+
+    def plot_resolution(self, curve_id):
+        """
+        :return: The key of a curve's points in the cache besides its id and version: its
+                 resolution, or the current view in level of detail mode.
+        """
+        if self.level_of_detail:
+            # Les points dépendent de la vue courante, qui fait donc partie de la clé du cache
+            return ("lod",) + self.viewport()
+        return self.curve_resolution(curve_id)
+
+    def curve_points(self, curve_id):
+        """
+        Returns the points of a curve at its plotting resolution, from the cache if
+        they are there, otherwise computes them and adds them to the cache.
+        """
+        curve = self.courbes_[curve_id]
+        resolution = self.plot_resolution(curve_id)
+        with tracer.stage("Plotter.cache_lookup", curve_id, curve.get_type(), resolution):
+            points = self.cache.get(curve_id, curve.version, resolution)
+        if points is None:
+            with tracer.stage("Plotter.evaluation", curve_id, curve.get_type(), resolution):
+                kind = self.evaluation_kind(curve_id)
+                if self.in_background(curve_id, curve, resolution, kind):
+                    # Les points ne sont pas mis en cache: ce ne sont pas ceux de cette version
+                    self.submit_job(curve_id, curve, resolution, kind)
+                    return self.waiting_points(curve_id, curve, resolution)
+                points = self.evaluate_now(curve_id, curve, resolution, kind)
+                self.cache.put(curve_id, curve.version, resolution, points)
+        return points
+
+    def evaluation_kind(self, key):
+        """
+        :return: "incremental" if the key is the selected curve's points during a Drag & Drop,
+                 "full" otherwise (see self.evaluation_costs).
+        """
+        if key == self.selected_curve_id and self.picked_ctrl_point is not None:
+            return "incremental"
+        return "full"
+
+    def evaluation_work(self, curve_id, res):
+        """
+        :return: The amount of work of an evaluation of a curve, on which its estimated duration is
+                 based: its number of control points times the resolution (in level of detail mode,
+                 the default resolution of the curve).
+        """
+        if isinstance(res, tuple):
+            res = self.curve_resolution(curve_id)
+        return self.courbes_[curve_id].control_points().shape[1] * res
+
+    def estimated_duration(self, kind, key, res):
+        """
+        :return: The estimated duration of an evaluation of a key, in seconds (see self.evaluation_costs).
+        """
+        curve_id = key[1] if isinstance(key, tuple) else key
+        return self.evaluation_costs.get((kind, key), self.default_cost) * self.evaluation_work(curve_id, res)
+
+    def in_background(self, key, curve, res, kind="full"):
+        """
+        :return: True if the evaluation of the given key (curve id, or ("bending", id)) must be
+                 done in the background: background evaluation is enabled, the curve can be
+                 rebuilt by the worker, and the estimated duration of this kind of evaluation
+                 (see self.evaluation_costs) exceeds self.frame_budget. The duration of a Drag & Drop
+                 which was never measured is measured by evaluating it in the current thread.
+                 The curves being rebuilt with new hyperparameters are always evaluated in the background.
+        """
+        if not self.background_evaluation or curve_type_name(curve) is None:
+            return False
+        if (key[1] if isinstance(key, tuple) else key) in self.pending_parameters:
+            return True
+        if kind == "incremental" and (kind, key) not in self.evaluation_costs:
+            return False
+        return self.estimated_duration(kind, key, res) > self.frame_budget
+
+    def evaluate_now(self, key, curve, res, kind="full"):
+        """
+        Evaluates the points (at a resolution, or for a view in level of detail mode) or the bending
+        (if key is ("bending", id)) of a curve in the current thread, and remembers its duration for
+        this kind of evaluation. A pending job for this key is cancelled.
+        """
+        self.cancel_job(key)
+        start = time.perf_counter()
+        if isinstance(key, tuple):
+            result = curve.plot_bending(res)
+        elif isinstance(res, tuple):
+            result = self.lod_points(curve, key, res[1:])
+        else:
+            result = curve.points(res)
+        curve_id = key[1] if isinstance(key, tuple) else key
+        self.evaluation_costs[(kind, key)] = (time.perf_counter() - start) / self.evaluation_work(curve_id, res)
+        self.remember_result(key, result)
+        return result
+
+    def submit_job(self, key, curve, res, kind="full"):
+        """
+        Starts the evaluation of the points or the bending (if key is ("bending", id)) of a
+        curve in the background. The curve's control points, params and hyperparameters are
+        copied, so the curve may be modified during the evaluation. If new hyperparameters of
+        the curve are pending (see set_curve_parameter), the copy is built with them.
+        A pending job for the same key is cancelled, unless it already computes this version
+        at this resolution, with the same hyperparameters.
+        """
+        curve_id = key[1] if isinstance(key, tuple) else key
+        hyperparameters = self.pending_parameters.get(curve_id, curve.hyperparameters_values())
+        job_key = (curve.version, res, tuple(sorted(hyperparameters.items())))
+        if key in self.jobs and self.jobs[key][0] == job_key:
+            return
+        self.cancel_job(key)
+        if self.background_executor is None:
+            self.background_executor = ThreadPoolExecutor(max_workers=1)
+        if isinstance(key, tuple):
+            def evaluate(copy, cancelled):
+                return copy.plot_bending(res)
+        elif isinstance(res, tuple):
+            # La vue est celle de la demande: le worker ne doit pas accéder aux axes
+            def evaluate(copy, cancelled):
+                return self.lod_points(copy, viewport=res[1:])
+        else:
+            evaluate = functools.partial(chunked_points, res)
+        cancelled = threading.Event()
+        future = self.background_executor.submit(evaluate_job, curve_type_name(curve),
+                                                 curve.control_points().copy(),
+                                                 np.array(curve.params, dtype=float),
+                                                 dict(hyperparameters), evaluate, res, cancelled, curve_id)
+        self.jobs[key] = (job_key, future, cancelled, kind)
+
+    def cancel_job(self, key):
+        """
+        Cancels the pending job of a key, if there is one. A job which has not started
+        is dropped, a running one stops at its next chunk of points.
+        """
+        if key in self.jobs:
+            _, future, cancelled, _ = self.jobs.pop(key)
+            future.cancel()
+            cancelled.set()
+
+    def remember_result(self, key, result):
+        """
+        Keeps the last valid points or bending (as a single array) of a key, displayed while newer
+        ones are computed in the background. They are kept in the cache, within its memory budget.
+        """
+        self.cache.put(("last", key), 0, None, np.asarray(result))
+
+    def last_result(self, key):
+        """
+        :return: The last valid points or bending of a key (see remember_result), or None if
+                 there are none or if they were evicted from the cache.
+        """
+        return self.cache.get(("last", key), 0, None)
+
+    def waiting_points(self, curve_id, curve, res):
+        """
+        :return: The points displayed while those of the curve's current version are computed
+                 in the background: its last valid points, or a low resolution preview if it
+                 has none or if it is being dragged (the curve must then follow the cursor).
+                 The preview is computed with iter_points, which leaves the points cached by
+                 the curve at its full resolution untouched.
+        """
+        last = self.last_result(curve_id)
+        if last is not None and self.evaluation_kind(curve_id) == "full":
+            return last
+        preview_res = min(self.curve_resolution(curve_id), curve.control_points().shape[1] * self.preview_samples)
+        return np.concatenate(list(curve.iter_points(preview_res)), axis=1)
+
+    def has_pending_jobs(self):
+        """
+        :return: True if some evaluations are still running in the background.
+        """
+        return len(self.jobs) > 0
+
+    def collect_results(self):
+        """
+        Collects the results of the finished background jobs. Results computed for an older version
+        of their curve are discarded. The others are added to the cache, and the artists that display
+        them are updated. A curve rebuilt by the worker with new hyperparameters replaces the plotter's
+        curve (see set_curve_parameter).
+        :return: True if an artist was updated, i.e. the figure must be redrawn.
+        """
+        changed = False
+        for key, (job_key, future, _, kind) in list(self.jobs.items()):
+            if not future.done():
+                continue
+            del self.jobs[key]
+            if future.cancelled() or future.result() is None:
+                continue
+            (version, res, hyperparameters), (built, result, build_duration, duration) = job_key, future.result()
+            bending = isinstance(key, tuple)
+            curve_id = key[1] if bending else key
+            curve = self.courbes_.get(curve_id)
+            if curve is None:
+                continue
+            # Le worker fait toujours un calcul complet: sa durée n'est pas celle d'un Drag & Drop
+            work = self.evaluation_work(curve_id, res)
+            if kind == "full":
+                self.evaluation_costs[("full", key)] = duration / work
+            rebuilt = not bending and curve_id in self.pending_parameters
+            if rebuilt:
+                self.evaluation_costs[("rebuild", key)] = build_duration / work
+
+            if version != curve.version:
+                if rebuilt:
+                    # La courbe a été modifiée pendant sa reconstruction, qui est relancée
+                    self.submit_job(key, curve, self.plot_resolution(curve_id))
+                continue
+            if rebuilt:
+                if dict(hyperparameters) != self.pending_parameters[curve_id]:
+                    continue
+                # La courbe reconstruite par le worker remplace celle du plotter
+                del self.pending_parameters[curve_id]
+                built.version = curve.version + 1
+                self.courbes_[curve_id] = built
+                if self.selected_curve_id == curve_id:
+                    self.selected_curve = built
+                version = built.version
+            self.remember_result(key, result)
+
+            if bending:
+                if self.bending_mode and curve_id == self.selected_curve_id:
+                    self.bending_line.set_data(*result)
+                    self.axs.relim(visible_only=True)
+                    self.axs.autoscale_view()
+                    changed = True
+            else:
+                self.cache.put(curve_id, version, res, result)
+                if isinstance(res, tuple) and built.bezier_segments() is None and result.shape[1] > 0:
+                    # Boîte englobante de la courbe entière (voir lod_points)
+                    self.curves_bounds[curve_id] = (version, np.nanmin(result, axis=1), np.nanmax(result, axis=1))
+                line = self.curves_lines.get(curve_id)
+                if line is not None and line.get_visible():
+                    line.set_data(result[0, :], result[1, :])
+                    changed = True
+                if rebuilt and curve_id == self.selected_curve_id:
+                    self.update_control_points()
+        return changed
+
+    def evaluate_curves(self, curves_ids):
+        """
+        Computes the points of several curves at their plotting resolution with the
+        plotter's pool, and adds them to the cache.
+        With a thread pool, each curve computes its own points. With a process pool, the
+        curves are rebuilt in the workers from plain arrays (control points, params, type
+        name and hyperparameters, see courbes.catalogue.evaluate_curve): only those arrays
+        and the resulting points are exchanged between processes. The curves that can't be
+        rebuilt this way are computed in the current process.
+        """
+        if len(curves_ids) < 2:
+            return
+        if self.executor is None:
+            executor_class = ThreadPoolExecutor if self.pool == "thread" else ProcessPoolExecutor
+            self.executor = executor_class(max_workers=self.workers)
+
+        resolutions = [self.curve_resolution(curve_id) for curve_id in curves_ids]
+        curves = [self.courbes_[curve_id] for curve_id in curves_ids]
+        if self.pool == "thread":
+            all_points = self.executor.map(lambda curve, res: curve.points(res), curves, resolutions)
+        else:
+            types_names = [curve_type_name(curve) for curve in curves]
+            remote = [k for k, name in enumerate(types_names) if name is not None]
+            # Les courbes sont envoyées par paquets, pour amortir le coût de chaque échange
+            chunksize = max(1, len(remote) // (4 * (self.workers or os.cpu_count() or 1)))
+            remote_points = self.executor.map(evaluate_curve,
+                                              [types_names[k] for k in remote],
+                                              [curves[k].control_points() for k in remote],
+                                              [np.asarray(curves[k].params, dtype=float) for k in remote],
+                                              [curves[k].hyperparameters_values() for k in remote],
+                                              [resolutions[k] for k in remote],
+                                              chunksize=chunksize)
+            all_points = [None] * len(curves)
+            for k, points in zip(remote, remote_points):
+                all_points[k] = points
+            all_points = [curve.points(res) if points is None else points
+                          for curve, res, points in zip(curves, resolutions, all_points)]
+
+        for curve_id, curve, res, points in zip(curves_ids, curves, resolutions, all_points):
+            self.cache.put(curve_id, curve.version, res, points)
+
+    def shutdown(self):
+        """
+        Stops the plotter's evaluation pool and background worker, if they were started.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        for key in list(self.jobs):
+            self.cancel_job(key)
+        if self.background_executor is not None:
+            self.background_executor.shutdown()
+            self.background_executor = None
+
+    def viewport(self):
+        """
+        :return: The current view as a tuple (xmin, xmax, ymin, ymax, width, height),
+                 where width and height are the axes' size in pixels.
+        """
+        (xmin, xmax), (ymin, ymax) = sorted(self.get_xlims()), sorted(self.get_ylims())
+        return float(xmin), float(xmax), float(ymin), float(ymax), self.axs.bbox.width, self.axs.bbox.height
+
+    def refresh_level_of_detail(self, *args):
+        """
+        Recomputes the displayed curves for the current view, in level of detail mode.
+        Called when the axes' limits change or when the canvas is resized (see create_figure):
+        the figure must then be redrawn, as after any view change.
+        """
+        if not self.level_of_detail or self.bending_mode:
+            return
+        for curve_id, line in self.curves_lines.items():
+            if curve_id in self.courbes_ and line.get_visible():
+                points = self.curve_points(curve_id)
+                line.set_data(points[0, :], points[1, :])
+
+    def lod_points(self, curve, curve_id=None, viewport=None):
+        """
+        Computes the points of a curve for the current view (level of detail mode).
+        Curves made of Bezier segments are subdivided adaptively until they are flat up to
+        lod_tolerance pixels on screen, and the segments whose control points' bounding box lies
+        outside the view are skipped. For the other curves, the number of points of the whole
+        curve is chosen from the length of its control polygon on screen, and the whole curve is
+        skipped if the bounding box of its last points lies outside the view.
+        :param curve_id: Id of the curve in the plotter, under which its bounding box is kept.
+        :param viewport: View for which the points are computed (see viewport), by default the
+                         current one. It must be given outside of the interface's thread.
+        """
+        xmin, xmax, ymin, ymax, width, height = self.viewport() if viewport is None else viewport
+        # Pixels par unité sur chaque axe
+        scale = np.array([width / (xmax - xmin), height / (ymax - ymin)])
+
+        bezier = curve.bezier_segments()
+        if bezier is None:
+            bounds = self.curves_bounds.get(curve_id)
+            if bounds is not None and bounds[0] == curve.version:
+                (xlow, ylow), (xhigh, yhigh) = bounds[1:]
+                if xhigh < xmin or xlow > xmax or yhigh < ymin or ylow > ymax:
+                    return np.empty((2, 0))
+            polygon = np.diff(curve.control_points(), axis=1) * scale[:, np.newaxis]
+            length = np.linalg.norm(polygon, axis=0).sum()
+            res = int(np.clip(np.ceil(length / self.pixels_per_sample), 2,
+                              self.max_samples_per_segment * polygon.shape[1]))
+            points = curve.points(res)
+            if curve_id is not None and points.shape[1] > 0:
+                self.curves_bounds[curve_id] = (curve.version, np.nanmin(points, axis=1), np.nanmax(points, axis=1))
+            return points
+
+        # Culling: boîtes englobantes des points de contrôle de chaque segment
+        lower, upper = bezier.min(axis=2), bezier.max(axis=2)
+        visible = ((upper[:, 0] >= xmin) & (lower[:, 0] <= xmax)
+                   & (upper[:, 1] >= ymin) & (lower[:, 1] <= ymax))
+
+        # Subdivision de chaque suite de segments visibles consécutifs, séparées par une
+        # colonne de NaN pour interrompre le tracé
+        max_depth = int(np.ceil(np.log2(self.max_samples_per_segment)))
+        bounds = np.flatnonzero(np.diff(np.concatenate(([False], visible, [False])).astype(int)))
+        parts = []
+        for start, stop in zip(bounds[::2], bounds[1::2]):
+            if parts:
+                parts.append(np.full((2, 1), np.nan))
+            parts.append(subdivision_adaptative(bezier[start:stop], self.lod_tolerance, max_depth, scale))
+        return np.concatenate(parts, axis=1) if parts else np.empty((2, 0))
+
+    def update_control_points(self):
+        """
+        Met à jour l'affichage des points de contrôle de la courbe sélectionnée.
+        """
+        self.ctrl_points_line.set_visible(True)
+        self.picked_point_line.set_visible(True)
+        if self.selected_curve is None:
+            self.ctrl_points_line.set_data([], [])
+            self.picked_point_line.set_data([], [])
+            return
+        ctrl_points = self.selected_curve.control_points()
+        self.ctrl_points_line.set_data(ctrl_points[0, :], ctrl_points[1, :])
+        if self.picked_ctrl_point is not None:
+            picked = ctrl_points[:, self.picked_ctrl_point]
+            self.picked_point_line.set_data([picked[0]], [picked[1]])
+        else:
+            self.picked_point_line.set_data([], [])
+
+    def selected_artists(self):
+        """
+        :return: The artists which are redrawn when the selected curve changes.
+        """
+        return [self.curves_lines[self.selected_curve_id], self.ctrl_points_line, self.picked_point_line]
+
+    def start_blit(self):
+        """
+        Saves the figure's background, without the selected curve and its control points,
+        so that they can be redrawn alone over it during a Drag & Drop.
+        """
+        if self.selected_curve is None:
+            return
+        canvas = self.fig.canvas
+        for artist in self.selected_artists():
+            artist.set_animated(True)
+        canvas.draw()
+        self.background = canvas.copy_from_bbox(self.axs.bbox)
+        self.blit()
+
+    def blit(self):
+        """
+        Redraws the selected curve and its control points over the saved background.
+        """
+        if self.background is None:
+            self.fig.canvas.draw_idle()
+            return
+        with tracer.stage("Plotter.blit", self.selected_curve_id):
+            canvas = self.fig.canvas
+            canvas.restore_region(self.background)
+            for artist in self.selected_artists():
+                self.axs.draw_artist(artist)
+            canvas.blit(self.axs.bbox)
+
+    def stop_blit(self):
+        """
+        Puts back the selected curve and its control points into the regular drawing.
+        """
+        for artist in [self.ctrl_points_line, self.picked_point_line] + list(self.curves_lines.values()):
+            artist.set_animated(False)
+        self.background = None
 
     def plot_bending(self):
         """
@@ -79,9 +694,23 @@ class Plotter:
         """
         if self.selected_curve is None:
             return
-        self.axs.clear()
-        timesteps, values = self.selected_curve.plot_bending(self.res)
-        self.axs.plot(timesteps, values)
+        self.apply_pending_parameters(self.selected_curve_id)
+        self.bending_mode = True
+        for artist in [self.ctrl_points_line, self.picked_point_line] + list(self.curves_lines.values()):
+            artist.set_visible(False)
+        key = ("bending", self.selected_curve_id)
+        with tracer.stage("Plotter.plot_bending", self.selected_curve_id, self.selected_curve.get_type(), self.res):
+            if self.in_background(key, self.selected_curve, self.res):
+                # En attendant le résultat, la dernière courbure calculée est affichée
+                self.submit_job(key, self.selected_curve, self.res)
+                last = self.last_result(key)
+                timesteps, values = ([], []) if last is None else last
+            else:
+                timesteps, values = self.evaluate_now(key, self.selected_curve, self.res)
+        self.bending_line.set_data(timesteps, values)
+        self.bending_line.set_visible(True)
+        self.axs.relim(visible_only=True)
+        self.axs.autoscale_view()
 
     def add_curve(self, curve: Courbe):
         """
@@ -89,15 +718,46 @@ class Plotter:
         Retourne l'indice de la courbe dans le gestionnaire (à retenir par exemple
         pour supprimer la courbe par la suite).
         """
-        curve_id = curve.get_type() + " " + str(len(self.courbes_))
+        curve_id = curve.get_type() + " " + str(self.nb_added_curves)
+        self.nb_added_curves += 1
         self.courbes_[curve_id] = curve
-        # Pré-calcul des points de la courbe
-        resolution = len(list(curve.control_points_as_points())) * 30
-        self.cache[curve_id] = curve.points(resolution)
+        # Pré-calcul des points de la courbe (avec un pool, update les calcule via evaluate_curves)
+        if self.pool is None:
+            self.curve_points(curve_id)
 
         self.update()
         return len(self.courbes_) - 1
 
+    def add_curves(self, curves):
+        """
+        Ajoute plusieurs courbes au plotter, en ne mettant l'affichage à jour qu'une seule fois.
+        :return: La liste des identifiants des courbes ajoutées.
+        """
+        curves_ids = []
+        for curve in curves:
+            curve_id = curve.get_type() + " " + str(self.nb_added_curves)
+            self.nb_added_curves += 1
+            self.courbes_[curve_id] = curve
+            curves_ids.append(curve_id)
+        self.update()
+        return curves_ids
+
+    def save_scene(self, path):
+        """
+        Saves all the plotter's curves as a scene (see scene.save_scene).
+        """
+        for curve_id in list(self.pending_parameters):
+            self.apply_pending_parameters(curve_id)
+        save_scene(path, self.courbes_.values())
+
+    def load_scene(self, path):
+        """
+        Adds all the curves of a scene saved by save_scene to the plotter.
+        Every curve is built when the scene is loaded, since they are all drawn by the next update.
+        :return: La liste des identifiants des courbes ajoutées.
+        """
+        return self.add_curves(load_scene(path))
+
     def remove_curve(self, curve_id):
         """
         Retire une courbe du gestionnaire, à partir de son indice.
@@ -108,6 +768,16 @@ class Plotter:
             self.selected_curve = None
             self.selected_curve_id = None
         del self.courbes_[curve_id]
+        self.cache.remove(curve_id)
+        for key in (curve_id, ("bending", curve_id)):
+            self.cancel_job(key)
+            self.cache.remove(("last", key))
+            for kind in ("incremental", "full", "rebuild"):
+                self.evaluation_costs.pop((kind, key), None)
+        self.pending_parameters.pop(curve_id, None)
+        self.curves_bounds.pop(curve_id, None)
+        if curve_id in self.curves_lines:
+            self.curves_lines.pop(curve_id).remove()
         self.update()
 
     def remove_selected_curve(self):
@@ -145,25 +815,44 @@ class Plotter:
 
     def get_figure(self):
         """
-        :return: The pyplot Figure object created by the plotter.
+        :return: The matplotlib Figure object created by the plotter.
         """
         return self.fig
 
-    def on_pick_event(self, event):
+    def control_points_index(self):
+        """
+        :return: A GridIndex of the selected curve's control points in display coordinates.
+                 It is only rebuilt when the curve or the view have changed since the last call.
+        """
+        key = (self.selected_curve_id, self.selected_curve.version, self.viewport(), self.axs.bbox.bounds)
+        if key != self.ctrl_index_key:
+            display_points = self.axs.transData.transform(self.selected_curve.control_points().T).T
+            self.ctrl_index = GridIndex(display_points, self.pick_radius)
+            self.ctrl_index_key = key
+        return self.ctrl_index
+
+    def on_press_event(self, event):
         """
-        Event associated with the picking of a Line or a point.
-        Sets the point as selected.
+        Event associated with a mouse click on the figure.
+        If a control point of the selected curve lies under the cursor, sets it as selected.
+        Nothing can be picked while the bending is shown (see plot_bending).
+        :return: True if a control point was picked.
         """
-        point = event.artist
-        if isinstance(point, Line2D):
-            # Remembers the picking coordinates
-            self.pick_pos = (point.get_xdata()[0], point.get_ydata()[0])
+        if self.selected_curve is None or self.bending_mode or event.inaxes is not self.axs:
+            return False
+        picked = self.control_points_index().nearest(event.x, event.y, self.pick_radius)
+        if picked is None:
+            return False
+        # Remembers which Control point of the selected curve has
+        # been selected (precisely, remembers its index in
+        # self.selected_curve.control_points() ).
+        self.picked_ctrl_point = picked
+        # La courbe déplacée doit avoir ses derniers hyperparamètres
+        self.apply_pending_parameters(self.selected_curve_id)
 
-            # Remembers which Control point of the selected curve has
-            # been selected (precisely, remembers its index in
-            # self.selected_curve.control_points() ).
-            self.picked_ctrl_point = self.identify_control_point(*self.pick_pos)
-            self.update()
+        # Remembers the picking coordinates
+        self.pick_pos = tuple(self.selected_curve.control_points()[:, self.picked_ctrl_point])
+        self.update_control_points()
         return True
 
     def drag_event(self, event):
@@ -173,23 +862,27 @@ class Plotter:
         Displaces it a the position of the cursor and recomputes the selected curve.
         """
         if self.selected_curve is not None and self.picked_ctrl_point is not None:
-            # Current mouse coordinates
-            mouse_pos = [event.xdata, event.ydata]
-
-            xlims, ylims = self.axs.get_xlim(), self.axs.get_ylim()
-            if mouse_pos[0] is None or mouse_pos[1] is None:
-                return
-
-            # Sets this position as the new control point for the
-            # currently selected curve
-            self.selected_curve.set_control_point(self.picked_ctrl_point,
-                                                  Point(*mouse_pos))
-
-            # Updates the canvas
-            # Delete the selected curve from the cache, as it needs to be
-            # recomputed
-            del self.cache[self.selected_curve_id]
-            self.update()
+            with tracer.stage("Plotter.drag_event", self.selected_curve_id, self.selected_curve.get_type()):
+                # Current mouse coordinates
+                mouse_pos = [event.xdata, event.ydata]
+                if mouse_pos[0] is None or mouse_pos[1] is None:
+                    return
+
+                # Sets this position as the new control point for the
+                # currently selected curve
+                self.selected_curve.set_control_point(self.picked_ctrl_point,
+                                                      Point(*mouse_pos))
+                # Moves the point in the control points index as well, rather than rebuilding it
+                if self.ctrl_index_key is not None and self.ctrl_index_key[0] == self.selected_curve_id:
+                    self.ctrl_index.move(self.picked_ctrl_point, *self.axs.transData.transform(mouse_pos))
+                    self.ctrl_index_key = ((self.selected_curve_id, self.selected_curve.version)
+                                           + self.ctrl_index_key[2:])
+
+                # Updates the artists of the selected curve only
+                # (the curve's version changed, so its points are recomputed)
+                points = self.curve_points(self.selected_curve_id)
+                self.curves_lines[self.selected_curve_id].set_data(points[0, :], points[1, :])
+                self.update_control_points()
         return True
 
     def on_release_event(self, event):
@@ -199,22 +892,96 @@ class Plotter:
         """
         if self.picked_ctrl_point is not None:
             self.picked_ctrl_point = None
+            self.update_control_points()
         return True
 
-    def identify_control_point(self, picked_x, picked_y):
+    def curve_segments(self, curve_id):
         """
-        Identifies which of the selected curve's control points,
-        given the coordinates of the picking.
-        :return: The index of the control point picked in
-                self.selected_curve.control_points()
+        :return: The cubic Bezier segments of a curve, as a numpy array of shape (nb_segments, 2, 4).
+                 A curve which isn't made of Bezier segments is approached by its plotted points,
+                 each pair of successive points giving a straight segment.
         """
-        if self.selected_curve is None:
-            return
-        # Browses all control points from the selected curve, and finds
-        # the one whose coordinates match picked_x, picked_y
-        for k, pt in enumerate(self.selected_curve.control_points_as_points()):
-            if pt[0] == picked_x and pt[1] == picked_y:
-                return k
+        curve = self.courbes_[curve_id]
+        bezier = curve.bezier_segments()
+        if bezier is not None:
+            return bezier
+        points = curve.points(self.curve_resolution(curve_id))
+        start, end = points[:, :-1].T, points[:, 1:].T
+        return np.stack((start, start + (end - start) / 3, start + 2 * (end - start) / 3, end), axis=2)
+
+    def curve_hierarchy(self, curve_id):
+        """
+        :return: (segments, hierarchy): the Bezier segments of a curve and the BoundingVolumeHierarchy
+                 of their control points' boxes, which contain them (convex hull property).
+                 They are only recomputed when the curve has changed.
+        """
+        curve = self.courbes_[curve_id]
+        if curve_id not in self.curves_hierarchies or self.curves_hierarchies[curve_id][0] != curve.version:
+            segments = self.curve_segments(curve_id)
+            hierarchy = BoundingVolumeHierarchy(segments.min(axis=2), segments.max(axis=2))
+            self.curves_hierarchies[curve_id] = (curve.version, segments, hierarchy)
+        return self.curves_hierarchies[curve_id][1:]
+
+    def curve_at(self, x, y, tol):
+        """
+        Finds the curve nearest to the position (x, y), in data coordinates.
+        :param tol: Maximum distance between the position and the curve.
+        :return: (curve_id, parameter) where parameter is the value of the curve's parameter
+                 at the nearest point, or None if no curve lies within tol.
+        """
+        # Hierarchy of the curves' boxes, rebuilt when a curve was added or removed. When a curve
+        # was modified, only its own hierarchy is rebuilt, and its box is refitted in this one.
+        if list(self.courbes_) != self.scene_curves:
+            for curve_id in list(self.curves_hierarchies):
+                if curve_id not in self.courbes_:
+                    del self.curves_hierarchies[curve_id]
+            self.scene_curves = list(self.courbes_)
+            self.scene_versions = [curve.version for curve in self.courbes_.values()]
+            bounds = [self.curve_hierarchy(curve_id)[1].bounds for curve_id in self.scene_curves]
+            lower = np.array([b[0] for b in bounds]).reshape(-1, 2)
+            upper = np.array([b[1] for b in bounds]).reshape(-1, 2)
+            self.scene_hierarchy = BoundingVolumeHierarchy(lower, upper)
+        else:
+            for index, curve in enumerate(self.courbes_.values()):
+                if curve.version != self.scene_versions[index]:
+                    self.scene_hierarchy.refit(index, *self.curve_hierarchy(self.scene_curves[index])[1].bounds)
+                    self.scene_versions[index] = curve.version
+
+        def segments_distances(segments):
+            return lambda indices: projection_bezier(segments[indices], (x, y))
+
+        def curves_distances(indices):
+            distances, data = np.full(len(indices), np.inf), [None] * len(indices)
+            for k, index in enumerate(indices):
+                segments, hierarchy = self.curve_hierarchy(self.scene_curves[index])
+                found = hierarchy.nearest(x, y, tol, segments_distances(segments))
+                if found is not None:
+                    distances[k], data[k] = found[1], (found[0], found[2])
+            return distances, data
+
+        found = self.scene_hierarchy.nearest(x, y, tol, curves_distances)
+        if found is None:
+            return None
+        curve_id = self.scene_curves[found[0]]
+        segment, t = found[2]
+        curve = self.courbes_[curve_id]
+        if curve.bezier_segments() is not None:
+            return curve_id, curve.segment_parameter(segment, t)
+        # Straight segments between the plotted points, evenly spaced along the parameter
+        nb_segments = self.curves_hierarchies[curve_id][1].shape[0]
+        return curve_id, curve.params[0] + (segment + t) / nb_segments * (curve.params[-1] - curve.params[0])
+
+    def curve_at_event(self, event):
+        """
+        Finds the curve under the cursor of a mouse event, within the pick radius.
+        :return: (curve_id, parameter) as curve_at, or None (always while the bending is shown).
+        """
+        if self.bending_mode or event.inaxes is not self.axs or not self.courbes_:
+            return None
+        # Pick radius converted from pixels to data units
+        origin, corner = self.axs.transData.inverted().transform([(0, 0), (self.pick_radius, self.pick_radius)])
+        tol = np.max(np.abs(corner - origin))
+        return self.curve_at(event.xdata, event.ydata, tol)
 
     def get_curve_parameters(self):
         """
@@ -226,22 +993,61 @@ class Plotter:
             return None
         return self.selected_curve.hyperparameters()
 
+    def get_curve_parameters_values(self):
+        """
+        :return: A dictionnary of the values of the selected curve's parameters, including
+                 those which are still being applied in the background (see set_curve_parameter).
+        """
+        if self.selected_curve is None:
+            return None
+        values = self.selected_curve.hyperparameters_values()
+        values.update(self.pending_parameters.get(self.selected_curve_id, {}))
+        return values
+
     def set_curve_parameter(self,  paremeter_name, value):
         """
         Sets the value for a specific parameter of a plotted curve.
+        Changing a parameter rebuilds the whole curve: if this rebuild and the evaluation of the
+        curve are estimated as too long, both are done in the background, and the curve is displayed
+        as it was until the rebuilt curve replaces it (see collect_results).
         :param paremeter_name: Name of the parameter (ex: tension for a CHS).
         :param value: New value for the parameter.
         """
         curve = self.selected_curve
         if curve is None:
             raise ValueError("Error CURVEPARAM0: No curve currently selected !")
-        curve.set_parameter_value(paremeter_name, value)
-        # Suppress the curve's cache to recompute it
-        del self.cache[self.selected_curve_id]
+        curve_id = self.selected_curve_id
+        self.pending_parameters[curve_id] = self.get_curve_parameters_values()
+        self.pending_parameters[curve_id][paremeter_name] = value
+
+        resolution = self.plot_resolution(curve_id)
+        if (self.in_background(curve_id, curve, resolution)
+                or self.estimated_duration("rebuild", curve_id, resolution) > self.frame_budget):
+            self.submit_job(curve_id, curve, resolution)
+        else:
+            self.apply_pending_parameters(curve_id)
 
         # Refresh
         self.update()
 
+    def apply_pending_parameters(self, curve_id):
+        """
+        Applies in the current thread the parameters of a curve which are still being applied in the
+        background (see set_curve_parameter), when the curve is needed at once, and remembers the
+        duration of its rebuild.
+        """
+        hyperparameters = self.pending_parameters.pop(curve_id, None)
+        if hyperparameters is None:
+            return
+        self.cancel_job(curve_id)
+        curve = self.courbes_[curve_id]
+        start = time.perf_counter()
+        for name, value in hyperparameters.items():
+            if curve.hyperparameters_values()[name] != value:
+                curve.set_parameter_value(name, value)
+        self.evaluation_costs[("rebuild", curve_id)] = ((time.perf_counter() - start)
+                                                        / self.evaluation_work(curve_id, self.plot_resolution(curve_id)))
+
     def get_ylims(self):
         """
         :return: Returns the limits of the horizontal axis as a couple (ymin, ymax)
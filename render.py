@@ -0,0 +1,139 @@
+"""
+Rendu des courbes sans interface graphique.
+
+Lit un dossier de fichiers de définition de courbes et écrit une image par fichier.
+Chaque fichier est traité par un processus d'un pool, indépendamment des autres.
+
+Un fichier de définition est un fichier JSON de la forme:
+    {"curves": [{"type": "C2 Spline",
+                 "points": [[0, 0], [-1, 4], [3, 3]],
+                 "params": [0, 1, 2],
+                 "hyperparameters": {"tolerance": 1e-10},
+                 "resolution": 90}]}
+Seuls "type" et "points" sont obligatoires. Les types possibles sont les clés de
+courbes.catalogue.curves_constructors, et les points peuvent aussi être donnés sous
+la forme d'une chaîne "x0 y0 x1 y1 ..". Un fichier peut également ne contenir
+qu'une seule courbe, directement au premier niveau.
+
+Utilisation:
+    python render.py definitions/ images/ --format png svg --workers 4
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from courbes.catalogue import curves_constructors
+from geom_utils.point import from_numpy_array, from_string
+
+
+def load_curves(path):
+    """
+    Reads a curve definition file.
+    :param path: Path to a JSON curve definition file (see the module's documentation).
+    :return: A list of (curve, resolution) pairs, where resolution is None when
+             the file does not specify one.
+    """
+    with open(path) as definition_file:
+        definition = json.load(definition_file)
+    if "curves" not in definition:
+        definition = {"curves": [definition]}
+
+    curves = []
+    for curve_def in definition["curves"]:
+        if curve_def["type"] not in curves_constructors:
+            raise ValueError("Unknown curve type: {}".format(curve_def["type"]))
+
+        if isinstance(curve_def["points"], str):
+            points = from_string(curve_def["points"])
+        else:
+            points = from_numpy_array(np.array(curve_def["points"], dtype=float).T)
+        params = curve_def.get("params", np.arange(len(points)))
+        params = np.asarray(params, dtype=float)
+
+        constructor = curves_constructors[curve_def["type"]]
+        curve = constructor(points, params, **curve_def.get("hyperparameters", {}))
+        curves.append((curve, curve_def.get("resolution")))
+    return curves
+
+
+def render_file(path, output_dir, formats, size=(8, 6), dpi=100, show_control_points=False):
+    """
+    Renders all curves of a definition file into one image per format.
+    The figure is created without pyplot, so that no GUI backend is ever loaded.
+    :param path:        Path to the definition file.
+    :param output_dir:  Directory in which the images are written.
+    :param formats:     Iterable of image formats, such as ("png", "svg").
+    :param size:        Size of the figure, in inches.
+    :param dpi:         Resolution of the raster images.
+    :param show_control_points: If True, the control points of each curve are drawn too.
+    :return: The list of the written files.
+    """
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    axs = fig.add_subplot(111)
+
+    for curve, resolution in load_curves(path):
+        if resolution is None:
+            # Même résolution que dans le viewer (voir Plotter.curve_resolution)
+            resolution = curve.control_points().shape[1] * 30
+        points = curve.points(resolution)
+        axs.plot(points[0, :], points[1, :])
+        if show_control_points:
+            ctrl_points = curve.control_points()
+            axs.plot(ctrl_points[0, :], ctrl_points[1, :], "ro")
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    written = []
+    for image_format in formats:
+        output_path = os.path.join(output_dir, "{}.{}".format(name, image_format))
+        fig.savefig(output_path, format=image_format)
+        written.append(output_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders curve definition files to images, without any GUI.")
+    parser.add_argument("input_dir", help="Directory containing the JSON curve definition files")
+    parser.add_argument("output_dir", help="Directory in which the images are written")
+    parser.add_argument("--format", nargs="+", default=["png"], choices=["png", "svg"], dest="formats",
+                        help="Image formats to write (default: png)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--size", type=float, nargs=2, default=(8, 6), metavar=("WIDTH", "HEIGHT"),
+                        help="Size of the images, in inches")
+    parser.add_argument("--dpi", type=int, default=100, help="Resolution of the PNG images")
+    parser.add_argument("--control-points", action="store_true", help="Also draws the control points")
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+                   if name.endswith(".json"))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Un fichier par tâche: un fichier invalide n'empêche pas le rendu des autres
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        tasks = {pool.submit(render_file, path, args.output_dir, args.formats, tuple(args.size),
+                             args.dpi, args.control_points): path
+                 for path in paths}
+        for task in as_completed(tasks):
+            try:
+                for output_path in task.result():
+                    print(output_path)
+            except Exception as error:
+                failures += 1
+                print("Failed to render {}: {}".format(tasks[task], error), file=sys.stderr)
+
+    print("{} file(s) rendered, {} failure(s).".format(len(paths) - failures, failures))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
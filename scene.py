@@ -0,0 +1,158 @@
+"""
+Implémente la sauvegarde et le chargement de scènes (ensembles de courbes).
+
+Une scène est un dossier contenant des tableaux numpy bruts (.npy), qui peuvent être
+projetés en mémoire (memory-mapped) au chargement:
+- points.npy:           (2, nb_points_total) points de contrôle de toutes les courbes, à la suite;
+- params.npy:           (nb_points_total,) paramètres associés à ces points;
+- offsets.npy:          (nb_courbes + 1,) les points de la courbe i sont les colonnes
+                        offsets[i]..offsets[i + 1] - 1 des deux tableaux précédents;
+- types.npy:            (nb_courbes,) indice du type de chaque courbe dans header.json;
+- hyperparameters.npy:  (nb_courbes, nb_hyperparamètres) valeurs des hyperparamètres, NaN
+                        lorsqu'une courbe n'a pas l'hyperparamètre. Les valeurs non numériques
+                        sont remplacées par leur indice dans le vocabulaire de header.json.
+header.json ne contient que les noms des types et des hyperparamètres: sa taille ne
+dépend pas du nombre de courbes.
+
+Une Scene ne construit chaque courbe que lorsqu'elle est demandée, ce qui permet par exemple
+de n'en lire que quelques-unes. Plotter.load_scene, qui affiche toutes les courbes, les
+construit en revanche toutes au chargement.
+"""
+
+
+import os
+import json
+import numpy as np
+from courbes.catalogue import curves_constructors, curve_type_name, build_curve
+
+"""
+Version of the scene format
+"""
+SCENE_FORMAT_VERSION = 1
+
+
+def save_scene(path, curves):
+    """
+    Saves a sequence of curves as a scene.
+    :param path:    Directory in which the scene is written. It is created if needed.
+    :param curves:  Iterable of curves, whose types must be in courbes.catalogue.curves_constructors.
+    """
+    curves = list(curves)
+
+    # Types et hyperparamètres rencontrés, dans l'ordre de leur première apparition
+    types, hyper_names, vocabularies = [], [], {}
+    curves_types, curves_hyperparameters = np.empty(len(curves), dtype=np.int16), []
+    for k, curve in enumerate(curves):
+        name = curve_type_name(curve)
+        if name is None:
+            raise ValueError("Curves of type {} can't be saved".format(type(curve).__name__))
+        if name not in types:
+            types.append(name)
+        curves_types[k] = types.index(name)
+
+        values = curve.hyperparameters_values()
+        for hyper_name, value in values.items():
+            if hyper_name not in hyper_names:
+                hyper_names.append(hyper_name)
+            if isinstance(value, str):
+                vocabulary = vocabularies.setdefault(hyper_name, [])
+                if value not in vocabulary:
+                    vocabulary.append(value)
+        curves_hyperparameters.append(values)
+
+    hyperparameters = np.full((len(curves), len(hyper_names)), np.nan)
+    for k, values in enumerate(curves_hyperparameters):
+        for hyper_name, value in values.items():
+            column = hyper_names.index(hyper_name)
+            if hyper_name in vocabularies:
+                hyperparameters[k, column] = vocabularies[hyper_name].index(value)
+            else:
+                hyperparameters[k, column] = value
+
+    # Points de contrôle et paramètres de toutes les courbes, mis bout à bout
+    counts = [curve.control_points().shape[1] for curve in curves]
+    offsets = np.zeros(len(curves) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    points, params = np.empty((2, offsets[-1])), np.empty(offsets[-1])
+    for k, curve in enumerate(curves):
+        points[:, offsets[k]:offsets[k + 1]] = curve.control_points()
+        params[offsets[k]:offsets[k + 1]] = curve.params
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "points.npy"), points)
+    np.save(os.path.join(path, "params.npy"), params)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    np.save(os.path.join(path, "types.npy"), curves_types)
+    np.save(os.path.join(path, "hyperparameters.npy"), hyperparameters)
+    with open(os.path.join(path, "header.json"), "w") as header_file:
+        json.dump({"version": SCENE_FORMAT_VERSION, "types": types,
+                   "hyperparameters": hyper_names, "vocabularies": vocabularies}, header_file)
+
+
+class Scene:
+    """
+    Scène chargée depuis le disque. Les tableaux sont projetés en mémoire, et chaque
+    courbe n'est construite que lorsqu'elle est demandée:
+        scene = Scene("dessin.scene")
+        courbe = scene[12]
+        for courbe in scene: ...
+    """
+    def __init__(self, path, mmap_mode="r"):
+        """
+        :param path:        Directory containing the scene (see save_scene).
+        :param mmap_mode:   Memory-mapping mode given to numpy.load. None loads the arrays in memory.
+        """
+        with open(os.path.join(path, "header.json")) as header_file:
+            header = json.load(header_file)
+        if header["version"] != SCENE_FORMAT_VERSION:
+            raise ValueError("Unsupported scene format version: {}".format(header["version"]))
+        for name in header["types"]:
+            if name not in curves_constructors:
+                raise ValueError("Unknown curve type: {}".format(name))
+
+        self.types = header["types"]
+        self.hyperparameters_names = header["hyperparameters"]
+        self.vocabularies = header["vocabularies"]
+
+        self.points = np.load(os.path.join(path, "points.npy"), mmap_mode=mmap_mode)
+        self.params = np.load(os.path.join(path, "params.npy"), mmap_mode=mmap_mode)
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode=mmap_mode)
+        self.curves_types = np.load(os.path.join(path, "types.npy"), mmap_mode=mmap_mode)
+        self.hyperparameters = np.load(os.path.join(path, "hyperparameters.npy"), mmap_mode=mmap_mode)
+
+    def __len__(self):
+        return len(self.curves_types)
+
+    def __getitem__(self, index):
+        """
+        Builds the (index)th curve of the scene.
+        Its control points are copied out of the mapped arrays, so the curve
+        can be modified freely.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Scene index out of range")
+
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        parameters = {}
+        for name, value in zip(self.hyperparameters_names, self.hyperparameters[index].tolist()):
+            if value != value:
+                # NaN: la courbe n'a pas cet hyperparamètre
+                continue
+            parameters[name] = self.vocabularies[name][int(value)] if name in self.vocabularies else value
+
+        return build_curve(self.types[self.curves_types[index]], np.array(self.points[:, start:stop]),
+                           np.array(self.params[start:stop]), parameters)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+def load_scene(path, mmap_mode="r"):
+    """
+    Loads a scene saved by save_scene.
+    :return: A Scene, which builds its curves lazily.
+    """
+    return Scene(path, mmap_mode)
@@ -2,22 +2,22 @@
 Fichier de test du module d'interfaces GUI tkinter.
 """
 
+import os
 import numpy as np
 from tkinter import *
 from interface.Interface import Interface
 from geom_utils.point import Point
-from courbes.spline_hermite_cubique import SplineHermiteCubique
-from courbes.splines_c2 import SplineC2
-from courbes.lagrange import CourbeLagrange
+from courbes.catalogue import curves_constructors
+from instrumentation import tracer
 
 
 if __name__ == "__main__":
     # Create a few curves
     points = [Point(0, 0), Point(-1, 4), Point(3, 3), Point(4, 7)]
 
-    spline = SplineHermiteCubique(points, np.arange(len(points)), tension=0)
-    spline2 = SplineC2(points, np.arange(len(points)))
-    lag1 = CourbeLagrange(points, np.arange(len(points)))
+    spline = curves_constructors['Cubic Hermite Spline'](points, np.arange(len(points)), tension=0)
+    spline2 = curves_constructors['C2 Spline'](points, np.arange(len(points)))
+    lag1 = curves_constructors['Lagrange Interpolation'](points, np.arange(len(points)))
 
     # Create the window and plot the curves
     window = Interface(Tk())
@@ -27,5 +27,15 @@ if __name__ == "__main__":
     window.plotter.update()
     window.refreshCurvesList()
 
+    # Records the duration of each stage if SPLINES_VIEWER_TRACE is set to the path of
+    # a Chrome trace file, and prints a summary every few seconds
+    trace_path = os.environ.get("SPLINES_VIEWER_TRACE")
+    if trace_path:
+        tracer.enable(summary_interval=5)
+
     # Display the window
     window.mainloop()
+
+    if trace_path:
+        tracer.print_summary()
+        tracer.export_chrome_trace(trace_path)